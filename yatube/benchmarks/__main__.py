@@ -0,0 +1,122 @@
+import argparse
+import os
+import sys
+
+import django
+
+from .datasets import SIZES, database_path
+from .report import compare, format_comparison, format_results, load, save
+
+
+def setup(size):
+    """Настраивает Django на отдельную базу набора size."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.conf import settings
+
+    os.makedirs(os.path.dirname(database_path(size)), exist_ok=True)
+    settings.DATABASES['default']['NAME'] = database_path(size)
+    django.setup()
+
+
+def run_command(args):
+    setup(args.size)
+    from .datasets import seed
+    from .runner import run
+
+    def write(message):
+        print(message, file=sys.stderr)
+
+    seed(args.size, write)
+    result = run(
+        args.size,
+        repeat=args.repeat,
+        cold=args.cache == 'cold',
+        roles=args.roles.split(','),
+        only=args.only,
+        write=write,
+    )
+    output = args.output or f'bench-{args.size}-{args.cache}.json'
+    save(output, result)
+    print(format_results(result))
+    print(f'\nРезультат сохранён в {output}', file=sys.stderr)
+    return 0
+
+
+def mixed_command(args):
+    setup(args.size)
+    from .concurrency import format_mixed, run_mixed
+    from .datasets import seed
+
+    def write(message):
+        print(message, file=sys.stderr)
+
+    seed(args.size, write)
+    result = run_mixed(
+        readers=args.readers,
+        writers=args.writers,
+        duration=args.duration,
+        write=write,
+    )
+    if args.output:
+        save(args.output, result)
+    print(format_mixed(result))
+    return 0
+
+
+def compare_command(args):
+    rows = compare(
+        load(args.base), load(args.head),
+        threshold=args.threshold, min_ms=args.min_ms,
+    )
+    print(format_comparison(rows))
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Замеры страниц Yatube на наборах фиксированного размера',
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='прогнать все URL')
+    run_parser.add_argument('--size', choices=list(SIZES), default='10k')
+    run_parser.add_argument('--repeat', type=int, default=30)
+    run_parser.add_argument(
+        '--cache', choices=('cold', 'warm'), default='cold',
+        help='cold — кэш очищается перед каждым замером',
+    )
+    run_parser.add_argument(
+        '--roles', default='guest,user',
+        help='кем заходить: guest, user или оба через запятую',
+    )
+    run_parser.add_argument('--only', help='подстрока имени URL')
+    run_parser.add_argument('--output', help='куда сохранить JSON')
+    run_parser.set_defaults(handler=run_command)
+
+    mixed_parser = commands.add_parser(
+        'mixed', help='чтение главной вперемешку с созданием постов')
+    mixed_parser.add_argument('--size', choices=list(SIZES), default='10k')
+    mixed_parser.add_argument('--readers', type=int, default=4)
+    mixed_parser.add_argument('--writers', type=int, default=1)
+    mixed_parser.add_argument(
+        '--duration', type=float, default=10.0,
+        help='секунд на каждый профиль прагм',
+    )
+    mixed_parser.add_argument('--output', help='куда сохранить JSON')
+    mixed_parser.set_defaults(handler=mixed_command)
+
+    compare_parser = commands.add_parser(
+        'compare', help='сравнить два JSON-результата')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument('--threshold', type=float, default=0.2)
+    compare_parser.add_argument('--min-ms', type=float, default=1.0)
+    compare_parser.set_defaults(handler=compare_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import multiprocessing
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.db.models import Max
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .report import summarize
+from .runner import bench_user, make_client
+
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+PROFILES = {
+    'default': DEFAULT_PRAGMAS,
+    'tuned': None,
+}
+
+START_DELAY: float = 1.0
+
+
+def read_index(client):
+    return client.get(reverse('posts:index'))
+
+
+def create_post(client):
+    return client.post(
+        reverse('posts:post_create'), {'text': 'Пост из замера нагрузки'})
+
+
+WORKLOADS = {'index': read_index, 'post_create': create_post}
+
+
+def init_worker(pragmas):
+    """Процесс пула: свой Django и свои соединения с прагмами профиля."""
+    import django
+    django.setup()
+    settings.SQLITE_PRAGMAS = pragmas
+    connections.close_all()
+
+
+def worker(kind, user_id, start_at, duration):
+    """Гоняет один вид запросов с start_at в течение duration секунд."""
+    client = make_client('user', User.objects.get(pk=user_id))
+    samples = []
+    errors = 0
+    time.sleep(max(start_at - time.time(), 0))
+    deadline = time.monotonic() + duration
+    try:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                WORKLOADS[kind](client)
+            except OperationalError:
+                errors += 1
+                continue
+            samples.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+    return kind, samples, errors
+
+
+def mixed_load(readers, writers, duration, user, pragmas):
+    """readers процессов читают главную, writers процессов создают посты.
+
+    Каждый участник — отдельный процесс со своим соединением SQLite,
+    поэтому замер показывает конкуренцию читателей и писателя в базе,
+    а не очередь за GIL.
+    """
+    jobs = [kind for kind, count in (('index', readers),
+                                     ('post_create', writers))
+            for _ in range(count)]
+    samples = {kind: [] for kind in WORKLOADS}
+    errors = Counter()
+    start_at = time.time() + START_DELAY
+    with multiprocessing.Pool(len(jobs), init_worker, (pragmas,)) as pool:
+        results = pool.starmap(
+            worker, [(kind, user.pk, start_at, duration) for kind in jobs])
+    for kind, kind_samples, kind_errors in results:
+        samples[kind].extend(kind_samples)
+        errors[kind] += kind_errors
+    return {
+        kind: {
+            'requests': len(samples[kind]),
+            'rps': round(len(samples[kind]) / duration, 1),
+            'errors': errors[kind],
+            **(summarize(samples[kind]) if samples[kind] else {}),
+        }
+        for kind in WORKLOADS
+    }
+
+
+def run_mixed(readers=4, writers=1, duration=10.0, write=print):
+    """Один и тот же смешанный прогон с прагмами Django и с настроенными.
+
+    Режим журнала переключается одним соединением до запуска
+    процессов: при открытых соединениях SQLite его не меняет. Посты,
+    созданные за прогон, удаляются, чтобы набор не менялся.
+    """
+    user = bench_user()
+    tuned = settings.SQLITE_PRAGMAS
+    last_post = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+    results = {}
+    try:
+        for profile, pragmas in PROFILES.items():
+            settings.SQLITE_PRAGMAS = pragmas or tuned
+            connections.close_all()
+            connection.ensure_connection()
+            connections.close_all()
+            write(f'Профиль {profile}: {readers} читателей, '
+                  f'{writers} писателей, {duration} с')
+            results[profile] = mixed_load(
+                readers, writers, duration, user, settings.SQLITE_PRAGMAS)
+    finally:
+        settings.SQLITE_PRAGMAS = tuned
+        connections.close_all()
+        Post.objects.filter(pk__gt=last_post).delete()
+    return {
+        'readers': readers,
+        'writers': writers,
+        'duration': duration,
+        'profiles': results,
+    }
+
+
+def format_mixed(result):
+    lines = [f'{"профиль":<10} {"запрос":<12} {"в сек":>7} '
+             f'{"p50":>8} {"p95":>8} {"ошибок":>7}']
+    for profile, kinds in result['profiles'].items():
+        for kind, stats in kinds.items():
+            lines.append(
+                f'{profile:<10} {kind:<12} {stats["rps"]:>7} '
+                f'{stats.get("p50_ms", "-"):>8} '
+                f'{stats.get("p95_ms", "-"):>8} {stats["errors"]:>7}'
+            )
+    return '\n'.join(lines)
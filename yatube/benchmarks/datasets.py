@@ -0,0 +1,39 @@
+import os
+
+from django.core.management import call_command
+
+SIZES = {
+    '10k': {
+        'users': 1000, 'groups': 20, 'posts': 10_000,
+        'comments': 30_000, 'follows_per_user': 20,
+    },
+    '1m': {
+        'users': 50_000, 'groups': 200, 'posts': 1_000_000,
+        'comments': 3_000_000, 'follows_per_user': 50,
+    },
+    '10m': {
+        'users': 500_000, 'groups': 1000, 'posts': 10_000_000,
+        'comments': 30_000_000, 'follows_per_user': 50,
+    },
+}
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def database_path(size):
+    return os.path.join(DATA_DIR, f'{size}.sqlite3')
+
+
+def seed(size, write):
+    """Создаёт базу набора size, если её ещё нет.
+
+    Данные генерируются с фиксированным seed, поэтому одна и та же
+    база получается на любой машине и для любого коммита.
+    """
+    from posts.loader import Progress, SyntheticData
+    from posts.models import Post
+
+    call_command('migrate', verbosity=0)
+    if Post.objects.exists():
+        return
+    SyntheticData(**SIZES[size], seed=0).load(Progress(write))
@@ -0,0 +1,76 @@
+import json
+import statistics
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(samples):
+    """p50/p95/p99 в миллисекундах по замерам в секундах."""
+    if len(samples) == 1:
+        cuts = samples * 99
+    else:
+        cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {
+        f'p{percentile}_ms': round(cuts[percentile - 1] * 1000, 3)
+        for percentile in PERCENTILES
+    }
+
+
+def load(path):
+    with open(path, encoding='utf-8') as result_file:
+        return json.load(result_file)
+
+
+def save(path, result):
+    with open(path, 'w', encoding='utf-8') as result_file:
+        json.dump(result, result_file, ensure_ascii=False, indent=2)
+
+
+def compare(base, head, threshold=0.2, min_ms=1.0):
+    """Сравнивает два прогона по каждому view.
+
+    Регрессия — рост p95 больше чем на threshold (и больше min_ms,
+    чтобы не ловить шум на быстрых страницах) или рост числа запросов.
+    Возвращает строки отчёта: (view, p95 до, p95 после, запросы до,
+    запросы после, регрессия ли).
+    """
+    rows = []
+    for name in sorted(base['views'].keys() & head['views'].keys()):
+        before, after = base['views'][name], head['views'][name]
+        if 'p95_ms' not in before or 'p95_ms' not in after:
+            continue
+        slower = (
+            after['p95_ms'] > before['p95_ms'] * (1 + threshold)
+            and after['p95_ms'] - before['p95_ms'] > min_ms
+        )
+        more_queries = after['queries'] > before['queries']
+        rows.append((
+            name, before['p95_ms'], after['p95_ms'],
+            before['queries'], after['queries'], slower or more_queries,
+        ))
+    return rows
+
+
+def format_results(result):
+    lines = [f'{"view":<48} {"p50":>9} {"p95":>9} {"p99":>9} {"SQL":>5}']
+    for name, view in sorted(result['views'].items()):
+        if 'p50_ms' not in view:
+            note = view.get('skipped') or view.get('error')
+            lines.append(f'{name:<48} {note}')
+            continue
+        lines.append(
+            f'{name:<48} {view["p50_ms"]:>9.2f} {view["p95_ms"]:>9.2f} '
+            f'{view["p99_ms"]:>9.2f} {view["queries"]:>5}'
+        )
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    lines = [f'{"view":<48} {"p95 до":>9} {"p95 после":>10} {"SQL":>9}']
+    for name, before, after, queries_before, queries_after, bad in rows:
+        mark = '  РЕГРЕССИЯ' if bad else ''
+        lines.append(
+            f'{name:<48} {before:>9.2f} {after:>10.2f} '
+            f'{queries_before:>4}→{queries_after:<4}{mark}'
+        )
+    return '\n'.join(lines)
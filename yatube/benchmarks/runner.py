@@ -0,0 +1,163 @@
+import resource
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import posts.urls
+import users.urls
+from posts.models import Group, Post, User
+
+from .report import summarize
+
+BENCH_USERNAME = 'benchmark'
+
+URL_MODULES = (('posts', posts.urls), ('users', users.urls))
+
+
+def sample_kwargs():
+    """Самые тяжёлые объекты набора для параметров URL."""
+    post = Post.objects.order_by('-comments_count', 'pk').first()
+    author = User.objects.order_by('-stats__followers_count', 'pk').first()
+    group = Group.objects.annotate(total=Count('posts')).order_by(
+        '-total', 'pk').first()
+    return {
+        'post_id': post.pk if post else None,
+        'username': author.username if author else None,
+        'slug': group.slug if group else None,
+        'table': 'groups',
+    }
+
+
+def targets():
+    """Все именованные URL из posts/urls.py и users/urls.py.
+
+    URL с параметрами, для которых нет образца (например, токен сброса
+    пароля), возвращаются с url=None.
+    """
+    kwargs = sample_kwargs()
+    for namespace, module in URL_MODULES:
+        for pattern in module.urlpatterns:
+            name = f'{namespace}:{pattern.name}'
+            params = list(pattern.pattern.converters)
+            if any(kwargs.get(param) is None for param in params):
+                yield name, None
+                continue
+            yield name, reverse(
+                name, kwargs={param: kwargs[param] for param in params})
+
+
+def bench_user():
+    user, _ = User.objects.get_or_create(
+        username=BENCH_USERNAME,
+        defaults={'is_staff': True},
+    )
+    return user
+
+
+def make_client(role, user):
+    client = Client()
+    if role == 'user':
+        client.force_login(user)
+    return client
+
+
+def request(client, url):
+    """Один замер: время ответа и число запросов к БД.
+
+    Запрос выполняется в транзакции, которая откатывается, поэтому
+    подписки, выходы и комментарии не меняют набор между замерами.
+    """
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+        transaction.set_rollback(True)
+    return response.status_code, elapsed, len(queries)
+
+
+def peak_allocation(client, url):
+    tracemalloc.start()
+    try:
+        request(client, url)
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_target(url, role, user, repeat, cold):
+    samples = []
+    status = queries = None
+    if not cold:
+        request(make_client(role, user), url)
+    for _ in range(repeat):
+        if cold:
+            cache.clear()
+        status, elapsed, queries = request(make_client(role, user), url)
+        samples.append(elapsed)
+    if cold:
+        cache.clear()
+    return {
+        'status': status,
+        'queries': queries,
+        **summarize(samples),
+        'peak_alloc_kb': peak_allocation(make_client(role, user), url),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(size, repeat=30, cold=True, roles=('guest', 'user'), only=None,
+        write=print):
+    """Прогоняет все URL и возвращает результат для сохранения в JSON.
+
+    Пик RSS — общий для всего прогона: ru_maxrss только растёт, поэтому
+    по видам сравнивается лишь peak_alloc_kb из tracemalloc.
+    """
+    user = bench_user()
+    views = {}
+    for name, url in targets():
+        if only and only not in name:
+            continue
+        for role in roles:
+            key = f'{name} [{role}]'
+            if url is None:
+                views[key] = {'skipped': 'нет образца параметров URL'}
+                continue
+            try:
+                views[key] = bench_target(url, role, user, repeat, cold)
+            except Exception as error:
+                views[key] = {'error': repr(error)}
+                write(f'{key}: ошибка {error!r}')
+                continue
+            write(f'{key}: p95 {views[key]["p95_ms"]} мс, '
+                  f'SQL {views[key]["queries"]}')
+    return {
+        'commit': git_commit(),
+        'size': size,
+        'cache': 'cold' if cold else 'warm',
+        'repeat': repeat,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'process_peak_rss_kb': resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss,
+        'views': views,
+    }
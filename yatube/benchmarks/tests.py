@@ -0,0 +1,49 @@
+from django.test import TestCase
+
+from posts.models import Group, Post, User
+
+from .report import compare, format_comparison, summarize
+from .runner import run
+
+
+def result(p95_ms, queries):
+    return {'views': {'posts:index [guest]': {
+        'p95_ms': p95_ms, 'queries': queries,
+    }}}
+
+
+class ReportTest(TestCase):
+    def test_summarize_percentiles(self):
+        summary = summarize([i / 1000 for i in range(1, 101)])
+        self.assertEqual(summary['p50_ms'], 50.5)
+        self.assertAlmostEqual(summary['p99_ms'], 99.01)
+
+    def test_slower_view_is_regression(self):
+        rows = compare(result(10.0, 3), result(13.0, 3))
+        self.assertTrue(rows[0][-1])
+        self.assertIn('РЕГРЕССИЯ', format_comparison(rows))
+
+    def test_noise_on_fast_view_is_ignored(self):
+        """Рост меньше min_ms не считается регрессией."""
+        self.assertFalse(compare(result(0.5, 3), result(0.9, 3))[0][-1])
+
+    def test_extra_query_is_regression(self):
+        self.assertTrue(compare(result(10.0, 3), result(10.0, 4))[0][-1])
+
+
+class RunnerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(text='Пост', author=author, group=group)
+
+    def test_run_records_views(self):
+        result = run('test', repeat=2, only='posts:', write=lambda _: None)
+        views = result['views']
+        self.assertEqual(views['posts:index [guest]']['status'], 200)
+        self.assertIn('peak_alloc_kb', views['posts:profile [user]'])
+        self.assertNotIn('peak_rss_kb', views['posts:profile [user]'])
+        self.assertIn('process_peak_rss_kb', result)
+        self.assertEqual(Post.objects.count(), 1)
@@ -0,0 +1,390 @@
+import atexit
+import math
+import os
+import pickle
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .metrics import current
+
+POLL_INTERVAL: float = 0.05
+
+Entry = namedtuple('Entry', 'blob fresh_until expires delta')
+
+_missing = object()
+
+_lock = threading.Lock()
+
+_memory = {}
+
+_paths = {}
+
+
+def count(hit):
+    """Попадание или промах в счётчики текущего запроса."""
+    stats = current()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+def get_or_compute(cache, key, compute, timeout=DEFAULT_TIMEOUT,
+                   cacheable=None):
+    """cache.get_or_compute у TieredCache, get/set у прочих бэкендов.
+
+    Без TieredCache защиты от лавины нет, но страницы работают с любым
+    бэкендом из CACHES.
+    """
+    if hasattr(cache, 'get_or_compute'):
+        return cache.get_or_compute(key, compute, timeout,
+                                    cacheable=cacheable)
+    value = cache.get(key, _missing)
+    count(value is not _missing)
+    if value is _missing:
+        value = compute()
+        if cacheable is None or cacheable(value):
+            cache.set(key, value, timeout)
+    return value
+
+
+class LRU:
+    """Кэш процесса: последние прочитанные записи L2 с коротким сроком.
+
+    Срок L1 ограничивает, сколько процесс может не видеть запись,
+    сделанную другим процессом в общий L2.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            deadline, entry = item
+            if deadline <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        deadline = time.time() + self.timeout
+        if entry.expires is not None:
+            deadline = min(deadline, entry.expires)
+        with self.lock:
+            self.entries[key] = deadline, entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def temporary_path():
+    """Файл L2 процесса, если общий путь не задан; удаляется при выходе."""
+    descriptor, path = tempfile.mkstemp(prefix='yatube-cache-',
+                                        suffix='.sqlite3')
+    os.close(descriptor)
+
+    def remove():
+        for name in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(name):
+                os.remove(name)
+
+    atexit.register(remove)
+    return path
+
+
+def is_fresh(entry, now):
+    return entry.fresh_until is None or entry.fresh_until > now
+
+
+def is_kept(entry, now):
+    return entry.expires is None or entry.expires > now
+
+
+class TieredCache(BaseCache):
+    """Двухуровневый кэш: LRU в памяти процесса перед общим файлом SQLite.
+
+    Обычные get/set ведут себя как у любого бэкенда Django. Пересчёт
+    дорогих значений идёт через get_or_compute: одно значение
+    пересчитывает один запрос на все процессы, остальные ждут его или
+    получают прежнее значение, а незадолго до истечения срока запись
+    пересчитывается заранее с вероятностью, растущей к концу срока
+    (XFetch).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._stale_timeout = options.get('STALE_TIMEOUT', 300)
+        self._lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self._wait_timeout = options.get('WAIT_TIMEOUT', 5)
+        self._beta = options.get('BETA', 1.0)
+        with _lock:
+            if location not in _paths:
+                _paths[location] = location or temporary_path()
+                _memory[location] = LRU(
+                    options.get('L1_MAX_ENTRIES', 1000),
+                    options.get('L1_TIMEOUT', 1),
+                )
+        self._path = _paths[location]
+        self._l1 = _memory[location]
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'fresh_until REAL, expires REAL, delta REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _load(self, key):
+        """Запись из L1 или L2, в том числе устаревшая, но хранимая."""
+        entry = self._l1.get(key)
+        if entry is not None:
+            return entry
+        row = self._db.execute(
+            'SELECT value, fresh_until, expires, delta FROM cache '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        entry = Entry(*row)
+        self._l1.put(key, entry)
+        return entry
+
+    def _store(self, key, value, timeout, delta=0.0, stale_timeout=0):
+        fresh_until = self.get_backend_timeout(timeout)
+        expires = None
+        if fresh_until is not None:
+            expires = fresh_until + stale_timeout
+            if expires <= time.time():
+                self._delete(key)
+                return
+        entry = Entry(pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                      fresh_until, expires, delta)
+        self._db.execute(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)',
+            (key, *entry),
+        )
+        self._l1.put(key, entry)
+        self._count_write()
+
+    def _delete(self, key):
+        self._l1.pop(key)
+        return self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def _count_write(self):
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._cull()
+
+    def _cull(self):
+        """Удаляет истёкшие записи, а при переполнении — ближайшие к сроку.
+
+        Живые замки get_or_compute не трогаются: их срок всегда самый
+        близкий, и без исключения они уходили бы первыми.
+        """
+        db = self._db
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                "WHERE key NOT LIKE '%:lock' "
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        entry = self._load(self._key(key, version))
+        hit = entry is not None and is_fresh(entry, time.time())
+        count(hit)
+        return pickle.loads(entry.blob) if hit else default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(self._key(key, version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        fresh_until = self.get_backend_timeout(timeout)
+        now = time.time()
+        if fresh_until is not None and fresh_until <= now:
+            return False
+        added = self._db.execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?, 0) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+            'fresh_until = excluded.fresh_until, '
+            'expires = excluded.expires, delta = 0 '
+            'WHERE cache.fresh_until IS NOT NULL AND cache.fresh_until <= ?',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             fresh_until, fresh_until, now),
+        ).rowcount > 0
+        if added:
+            self._l1.pop(key)
+            self._count_write()
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        fresh_until = self.get_backend_timeout(timeout)
+        self._l1.pop(key)
+        return self._db.execute(
+            'UPDATE cache SET fresh_until = ?, expires = ? WHERE key = ? '
+            'AND (fresh_until IS NULL OR fresh_until > ?)',
+            (fresh_until, fresh_until, key, time.time()),
+        ).rowcount > 0
+
+    def delete(self, key, version=None):
+        return self._delete(self._key(key, version))
+
+    def has_key(self, key, version=None):
+        entry = self._load(self._key(key, version))
+        return entry is not None and is_fresh(entry, time.time())
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно для всех процессов: чтение и запись в одной транзакции."""
+        key = self._key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (fresh_until IS NULL OR fresh_until > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        self._l1.pop(key)
+        return value
+
+    def clear(self):
+        self._l1.clear()
+        self._db.execute('DELETE FROM cache')
+
+    def get_or_compute(self, key, compute, timeout=DEFAULT_TIMEOUT,
+                       version=None, cacheable=None):
+        """Значение из кэша или результат compute() без лавины пересчётов.
+
+        Свежее значение отдаётся сразу. Близкое к сроку или устаревшее
+        (но не старше STALE_TIMEOUT) пересчитывает тот, кто взял замок,
+        а остальные отдают прежнее. Если значения нет совсем, остальные
+        ждут взявшего замок до WAIT_TIMEOUT. cacheable(value) решает,
+        сохранять ли посчитанное значение.
+        """
+        key = self._key(key, version)
+        entry = self._load(key)
+        if entry is not None:
+            value = pickle.loads(entry.blob)
+            if not self._should_refresh(entry):
+                count(True)
+                return value
+            locked = self._acquire(key)
+            if not locked:
+                count(True)
+                return value
+        else:
+            locked = self._acquire(key)
+            if not locked:
+                value = self._wait(key)
+                if value is not _missing:
+                    count(True)
+                    return value
+        count(False)
+        try:
+            started = time.perf_counter()
+            value = compute()
+            delta = time.perf_counter() - started
+            if cacheable is None or cacheable(value):
+                self._store(key, value, timeout, delta, self._stale_timeout)
+        finally:
+            if locked:
+                self._release(key)
+        return value
+
+    def _should_refresh(self, entry):
+        """XFetch: чем дороже пересчёт и ближе срок, тем вероятнее он."""
+        if entry.fresh_until is None:
+            return False
+        gap = -entry.delta * self._beta * math.log(1.0 - random.random())
+        return time.time() + gap >= entry.fresh_until
+
+    def _acquire(self, key):
+        now = time.time()
+        return self._db.execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?, 0) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'fresh_until = excluded.fresh_until, expires = excluded.expires '
+            'WHERE cache.expires <= ?',
+            (key + ':lock', b'', now + self._lock_timeout,
+             now + self._lock_timeout, now),
+        ).rowcount > 0
+
+    def _release(self, key):
+        self._db.execute('DELETE FROM cache WHERE key = ?', (key + ':lock',))
+
+    def _wait(self, key):
+        """Ждёт значение от взявшего замок или его ухода без значения."""
+        lock = key + ':lock'
+        deadline = time.monotonic() + self._wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            rows = dict(self._db.execute(
+                'SELECT key, value FROM cache WHERE key IN (?, ?) '
+                'AND (fresh_until IS NULL OR fresh_until > ?)',
+                (key, lock, time.time()),
+            ).fetchall())
+            if key in rows:
+                return pickle.loads(rows[key])
+            if lock not in rows:
+                break
+        return _missing
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.db import connections
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Настраивает новое соединение SQLite по SQLITE_PRAGMAS.
+
+    journal_mode=WAL хранится в самом файле базы, остальные прагмы
+    действуют только на соединение, поэтому ставятся при каждом
+    подключении.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def check_connections(**kwargs):
+    """Закрывает постоянные соединения, которые перестали отвечать.
+
+    Вызывается в начале запроса. Проверяются только соединения, на
+    которых уже была ошибка базы: исправное соединение не платит за
+    лишний запрос к SQLite, а с CONN_MAX_AGE = 0 оно и так новое.
+    """
+    for connection in connections.all():
+        if (connection.connection is not None
+                and connection.settings_dict['CONN_MAX_AGE']
+                and connection.errors_occurred):
+            if connection.is_usable():
+                connection.errors_occurred = False
+            else:
+                connection.close()
@@ -0,0 +1,52 @@
+import base64
+import json
+import re
+
+from django.template.loader import render_to_string
+
+HOLES = {}
+
+MARKER = re.compile(r'<!--hole:(\w+):([\w=-]*)-->')
+
+
+def register(name):
+    """Регистрирует функцию, которая рисует дырку name для запроса.
+
+    Функция получает request и параметры из тега {% hole %} и
+    возвращает HTML. Она вызывается на каждый запрос, поэтому должна
+    обходиться данными сессии или дешёвым запросом по индексу.
+    """
+    def decorator(func):
+        HOLES[name] = func
+        return func
+    return decorator
+
+
+def render_hole(request, name, params):
+    return HOLES[name](request, **params)
+
+
+def marker(name, params):
+    payload = base64.urlsafe_b64encode(
+        json.dumps(params, sort_keys=True).encode()
+    ).decode()
+    return f'<!--hole:{name}:{payload}-->'
+
+
+def fill_holes(request, content):
+    """Подставляет в общую страницу дырки текущего пользователя."""
+    def fill(match):
+        params = json.loads(base64.urlsafe_b64decode(match.group(2)))
+        return render_hole(request, match.group(1), params)
+    return MARKER.sub(fill, content)
+
+
+def fill_response(request, response):
+    content = response.content.decode(response.charset)
+    response.content = fill_holes(request, content)
+    return response
+
+
+@register('header')
+def header(request):
+    return render_to_string('includes/header.html', request=request)
@@ -0,0 +1,67 @@
+import os
+import pstats
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import make_token
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = 'Сводит сохранённые профили в отчёт о самых горячих функциях'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', help='Подстрока имени view, например posts.index',
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--sort', choices=SORT_KEYS, default='cumulative')
+        parser.add_argument(
+            '--token', metavar='USERNAME',
+            help='Напечатать значение заголовка X-Profile для сотрудника',
+        )
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.print_token(options['token'])
+            return
+        reported = 0
+        for view, paths in self.profiles(options['view']):
+            report = StringIO()
+            stats = pstats.Stats(*paths, stream=report)
+            stats.strip_dirs().sort_stats(options['sort'])
+            stats.print_stats(options['top'])
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{view}: профилей {len(paths)}'
+            ))
+            self.stdout.write(report.getvalue(), ending='')
+            reported += 1
+        if not reported:
+            self.stdout.write('Профилей нет')
+
+    def print_token(self, username):
+        User = get_user_model()
+        if not User.objects.filter(username=username, is_staff=True).exists():
+            raise CommandError(f'Нет сотрудника {username}')
+        self.stdout.write(f'X-Profile: {make_token(username)}')
+
+    @staticmethod
+    def profiles(view_filter):
+        if not os.path.isdir(settings.PROFILE_DIR):
+            return
+        for entry in sorted(os.scandir(settings.PROFILE_DIR),
+                            key=lambda entry: entry.name):
+            if not entry.is_dir():
+                continue
+            if view_filter and view_filter not in entry.name:
+                continue
+            paths = sorted(
+                profile.path for profile in os.scandir(entry.path)
+                if profile.name.endswith('.prof')
+            )
+            if paths:
+                yield entry.name, paths
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.replicas import copy_database, mark_synced
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в файлы реплик'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=float, metavar='SECONDS',
+            help='Повторять копирование с этим интервалом',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError(
+                'Реплики не настроены: задайте YATUBE_REPLICAS')
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Копирование файлом работает только с SQLite')
+        while True:
+            started = time.monotonic()
+            copied_up_to = time.time()
+            for alias in settings.REPLICA_DATABASES:
+                copy_database(source, settings.DATABASES[alias]['NAME'])
+                connections[alias].close()
+            mark_synced(copied_up_to)
+            self.stdout.write(
+                f'Реплики обновлены за {time.monotonic() - started:.2f} с')
+            if not options['every']:
+                return
+            time.sleep(options['every'])
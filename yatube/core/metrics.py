@@ -0,0 +1,218 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+UNRESOLVED_VIEW: str = 'unresolved'
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Счётчики одного запроса: SQL, шаблоны, кэш."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} SQL"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+
+def current():
+    """Счётчики запроса, который обрабатывает этот поток, или None."""
+    return getattr(_local, 'stats', None)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current()
+        if stats is None:
+            return super().render(context, request)
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, замеряющий время отрисовки.
+
+    Вложенные render_to_string (например, дырки, отрисованные на месте)
+    не считаются второй раз: учитывается только внешний шаблон.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {total}'
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def observe(self, stats, duration):
+        self.duration.observe(duration)
+        self.queries.observe(stats.queries)
+        self.db_seconds += stats.db_time
+        self.template_seconds += stats.template_time
+        self.cache_hits += stats.cache_hits
+        self.cache_misses += stats.cache_misses
+
+
+COUNTERS = (
+    ('yatube_db_seconds_total', 'db_seconds',
+     'Время SQL-запросов.'),
+    ('yatube_template_seconds_total', 'template_seconds',
+     'Время отрисовки шаблонов.'),
+    ('yatube_cache_hits_total', 'cache_hits', 'Попадания в кэш.'),
+    ('yatube_cache_misses_total', 'cache_misses', 'Промахи кэша.'),
+)
+
+
+class Registry:
+    """Метрики по view в памяти процесса.
+
+    Каждый процесс сервера копит свои значения; Prometheus собирает их
+    с каждого процесса и суммирует сам.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view, stats, duration):
+        with self.lock:
+            self.views.setdefault(view, ViewMetrics()).observe(
+                stats, duration)
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus."""
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = [
+                '# HELP yatube_request_duration_seconds '
+                'Время обработки запроса.',
+                '# TYPE yatube_request_duration_seconds histogram',
+            ]
+            for view, metrics in views:
+                lines.extend(metrics.duration.lines(
+                    'yatube_request_duration_seconds', f'view="{view}"'))
+            lines += [
+                '# HELP yatube_db_queries SQL-запросов на запрос.',
+                '# TYPE yatube_db_queries histogram',
+            ]
+            for view, metrics in views:
+                lines.extend(metrics.queries.lines(
+                    'yatube_db_queries', f'view="{view}"'))
+            for name, attribute, help_text in COUNTERS:
+                lines += [
+                    f'# HELP {name} {help_text}',
+                    f'# TYPE {name} counter',
+                ]
+                for view, metrics in views:
+                    value = getattr(metrics, attribute)
+                    lines.append(f'{name}{{view="{view}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNRESOLVED_VIEW
+
+
+class MetricsMiddleware:
+    """Замеряет каждый запрос и отдаёт итог в заголовке Server-Timing.
+
+    Стоит первым в MIDDLEWARE, чтобы total включал всю цепочку. Тело
+    потоковых ответов отдаётся уже после замера и в него не входит.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats(request)
+        _local.stats = stats
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.execute))
+                response = self.get_response(request)
+        finally:
+            _local.stats = None
+        duration = time.perf_counter() - stats.started
+        registry.observe(view_name(request), stats, duration)
+        response['Server-Timing'] = stats.server_timing(duration)
+        return response
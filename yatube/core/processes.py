@@ -0,0 +1,13 @@
+import os
+
+import django
+
+
+def setup_django(settings_module):
+    """Инициализатор процесса пула, запущенного через spawn.
+
+    Модуль не импортирует модели, поэтому его можно распаковать в
+    дочернем процессе до django.setup().
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
@@ -0,0 +1,90 @@
+import cProfile
+import os
+import random
+import re
+import time
+
+from django.conf import settings
+from django.core import signing
+
+from .metrics import view_name
+
+SALT: str = 'core.profiling'
+
+TOKEN_MAX_AGE: int = 3600
+
+HEADER_META_KEY: str = 'HTTP_X_PROFILE'
+
+
+def make_token(username):
+    """Значение заголовка X-Profile, действует TOKEN_MAX_AGE секунд."""
+    return signing.TimestampSigner(salt=SALT).sign(username)
+
+
+def has_valid_token(request):
+    token = request.META.get(HEADER_META_KEY)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def view_directory(view):
+    return os.path.join(
+        settings.PROFILE_DIR, re.sub(r'[^\w.-]', '.', view))
+
+
+def save_profile(view, profiler):
+    """Сохраняет профиль и оставляет у view только PROFILE_KEEP последних.
+
+    Старые профили удаляются по кругу, поэтому место на диске
+    ограничено числом view, умноженным на PROFILE_KEEP.
+    """
+    directory = view_directory(view)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(
+        directory, f'{time.time_ns()}-{os.getpid()}.prof')
+    profiler.dump_stats(path)
+    profiles = sorted(
+        entry.path for entry in os.scandir(directory)
+        if entry.name.endswith('.prof')
+    )
+    for old in profiles[:-settings.PROFILE_KEEP]:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+    return path
+
+
+class ProfileMiddleware:
+    """Профилирует долю запросов PROFILE_SAMPLE_RATE через cProfile.
+
+    Запрос с подписанным заголовком X-Profile (см. make_token и
+    profile_report --token) профилируется всегда. Остальные запросы
+    платят только за вызов random().
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        save_profile(view_name(request), profiler)
+        return response
+
+    @staticmethod
+    def should_profile(request):
+        rate = settings.PROFILE_SAMPLE_RATE
+        return (rate and random.random() < rate) or has_valid_token(request)
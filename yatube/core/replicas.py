@@ -0,0 +1,118 @@
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SYNCED_KEY: str = 'replica-synced-at'
+
+_local = threading.local()
+
+
+def pin_key(user_id):
+    return f'primary-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """После записи пользователь REPLICA_STICKY_SECONDS читает с основной.
+
+    Реплика отстаёт от основной базы, и без этого автор мог бы не
+    увидеть свой пост сразу после публикации.
+    """
+    cache.set(pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user):
+    return user.is_authenticated and bool(cache.get(pin_key(user.pk)))
+
+
+def mark_synced(timestamp):
+    """Запоминает время основной базы, до которого реплики догнали её."""
+    cache.set(SYNCED_KEY, timestamp, None)
+
+
+def synced_at():
+    """Время последней синхронизации реплик или None, если её не было."""
+    return cache.get(SYNCED_KEY)
+
+
+def forget_writes():
+    """Начинает новый запрос: прошлые записи потока не в счёт."""
+    _local.wrote = False
+
+
+@contextmanager
+def reading_from_replica():
+    """Чтения внутри блока идут на случайную реплику, если она есть."""
+    previous = getattr(_local, 'replica', None)
+    if settings.REPLICA_DATABASES:
+        _local.replica = random.choice(settings.REPLICA_DATABASES)
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+class ReplicaRouter:
+    """Запись всегда на основную базу, чтения — на реплику по запросу.
+
+    Реплика используется только внутри reading_from_replica, пока в
+    запросе не было записи и основная база не в транзакции: иначе
+    чтение могло бы не увидеть только что записанное.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(_local, 'replica', None)
+        if (replica is None or getattr(_local, 'wrote', False)
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Закрепляет за основной базой пользователя, который что-то записал.
+
+    Стоит после AuthenticationMiddleware, чтобы запись сессии в конце
+    запроса не считалась записью пользователя.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        forget_writes()
+        response = self.get_response(request)
+        if _local.wrote and settings.REPLICA_DATABASES:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return response
+
+
+def copy_database(source, target_path):
+    """Копирует базу SQLite source в файл реплики через backup API.
+
+    Копия пишется прямо в файл реплики под её блокировкой, поэтому
+    читатели реплики видят либо старую, либо новую версию целиком.
+    """
+    source.ensure_connection()
+    target = sqlite3.connect(target_path)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
@@ -0,0 +1,187 @@
+import logging
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .metrics import current, view_name
+
+logger = logging.getLogger(__name__)
+
+OUTSIDE_REQUEST: str = 'вне запроса'
+
+EXPLAINED_STATEMENTS = ('SELECT', 'WITH')
+
+FULL_SCAN = re.compile(
+    r'^(?:SCAN (?:TABLE )?\w+(?: AS \w+)?$|Seq Scan)', re.IGNORECASE,
+)
+
+LITERALS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """SQL без значений: запросы, отличающиеся только ими, совпадают.
+
+    IN-списки любой длины сворачиваются в (...), иначе лента подписок
+    давала бы отдельный отпечаток на каждое число авторов.
+    """
+    for pattern, replacement in LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def full_scans(plan):
+    """Строки плана, где таблица читается целиком, без индекса."""
+    return [line for line in plan if FULL_SCAN.match(line.strip())]
+
+
+class QueryStats:
+    def __init__(self, sql, plan):
+        self.example = sql
+        self.plan = plan
+        self.full_scan = bool(full_scans(plan))
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.views = set()
+
+    def observe(self, elapsed, view):
+        self.count += 1
+        self.total += elapsed
+        self.slowest = max(self.slowest, elapsed)
+        self.views.add(view)
+
+    def as_dict(self, fingerprint):
+        return {
+            'fingerprint': fingerprint,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'max_ms': round(self.slowest * 1000, 3),
+            'full_scan': self.full_scan,
+            'views': sorted(self.views),
+            'plan': self.plan,
+            'example': self.example,
+        }
+
+
+class SlowQueryLog:
+    """Медленные запросы процесса, сгруппированные по отпечатку.
+
+    План запроса снимается один раз на отпечаток: повторный EXPLAIN
+    для каждого медленного запроса сам стал бы нагрузкой.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = {}
+
+    def get(self, key):
+        with self.lock:
+            return self.queries.get(key)
+
+    def observe(self, key, sql, plan, elapsed, view):
+        with self.lock:
+            stats = self.queries.setdefault(key, QueryStats(sql, plan))
+            stats.observe(elapsed, view)
+            return stats
+
+    def worst(self, limit=20):
+        """Отпечатки с наибольшим суммарным временем."""
+        with self.lock:
+            ranked = sorted(
+                self.queries.items(),
+                key=lambda item: item[1].total, reverse=True,
+            )
+            return [stats.as_dict(key) for key, stats in ranked[:limit]]
+
+    def reset(self):
+        with self.lock:
+            self.queries.clear()
+
+
+slow_log = SlowQueryLog()
+
+
+class SlowQueryLogger:
+    """Обёртка execute, пишущая в лог запросы дольше порога."""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self.local, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            threshold = settings.SLOW_QUERY_THRESHOLD_MS
+            if threshold is not None and elapsed * 1000 >= threshold:
+                self.record(sql, params, many, context, elapsed)
+
+    def record(self, sql, params, many, context, elapsed):
+        key = fingerprint(sql)
+        known = slow_log.get(key)
+        plan = known.plan if known else self.explain(
+            context['connection'], sql, params, many)
+        stats = current()
+        view = view_name(stats.request) if stats else OUTSIDE_REQUEST
+        entry = slow_log.observe(key, sql, plan, elapsed, view)
+        logger.warning(
+            'Медленный запрос %.1f мс%s, %s: %s\n%s',
+            elapsed * 1000,
+            ' (полный просмотр таблицы)' if entry.full_scan else '',
+            view, key, '\n'.join(plan),
+        )
+
+    def explain(self, connection, sql, params, many):
+        if many or not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            return []
+        self.local.explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'{connection.ops.explain_prefix} {sql}', params)
+                return [str(row[-1]) for row in cursor.fetchall()]
+        except DatabaseError:
+            return []
+        finally:
+            self.local.explaining = False
+
+
+slow_query_logger = SlowQueryLogger()
+
+
+@contextmanager
+def logging_slow_queries():
+    """Пишет в лог медленные запросы всех соединений внутри блока.
+
+    Обёртки снимаются в порядке, обратном подключению, и не остаются
+    на соединении после блока.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(slow_query_logger))
+        yield
+
+
+class SlowQueryMiddleware:
+    """Стоит сразу после MetricsMiddleware: обёртки вкладываются."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with logging_slow_queries():
+            return self.get_response(request)
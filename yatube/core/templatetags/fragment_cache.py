@@ -0,0 +1,44 @@
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import TemplateSyntaxError, VariableDoesNotExist
+from django.templatetags import cache as django_cache
+
+from core.caching import get_or_compute
+
+register = template.Library()
+
+
+class CacheNode(django_cache.CacheNode):
+    """{% cache %}, пересчитывающий фрагмент через get_or_compute.
+
+    Истёкший фрагмент перерисовывает один запрос, а не все процессы
+    разом.
+    """
+
+    def render(self, context):
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except VariableDoesNotExist:
+            raise TemplateSyntaxError(
+                f'"cache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}')
+        if expire_time is not None:
+            expire_time = int(expire_time)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            cache,
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+        )
+
+
+@register.tag('cache')
+def do_cache(parser, token):
+    """Тот же синтаксис, что у {% cache %} из Django, без using=."""
+    node = django_cache.do_cache(parser, token)
+    if node.cache_name:
+        raise TemplateSyntaxError('"cache" tag does not support using=')
+    return CacheNode(node.nodelist, node.expire_time_var,
+                     node.fragment_name, node.vary_on, None)
@@ -0,0 +1,19 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.holes import marker, render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **params):
+    """Персональный фрагмент страницы.
+
+    Если страница собирается для общего кэша, на месте фрагмента
+    остаётся метка, которую заполняют уже для конкретного запроса.
+    """
+    request = context.get('request')
+    if getattr(request, 'punch_holes', False):
+        return mark_safe(marker(name, params))
+    return mark_safe(render_hole(request, name, params))
@@ -1,4 +1,31 @@
-from django.test import TestCase
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .caching import TieredCache, get_or_compute
+from .database import apply_pragmas, check_connections
+from .metrics import registry
+from .profiling import make_token, view_directory
+from .replicas import (ReplicaRouter, copy_database, forget_writes,
+                       pin_key, reading_from_replica)
+from .slow_queries import (fingerprint, full_scans, logging_slow_queries,
+                           slow_log)
+
+User = get_user_model()
+
+SLOW_QUERIES_LOGGER = 'core.slow_queries'
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +33,345 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def timing(self, response):
+        return dict(
+            part.strip().split(';', 1)
+            for part in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing_header(self):
+        timing = self.timing(self.client.get(reverse('posts:index')))
+        self.assertEqual(set(timing), {'db', 'tpl', 'cache', 'total'})
+        self.assertIn('SQL', timing['db'])
+
+    def test_cache_hits_are_counted(self):
+        """Второй анонимный запрос отдаётся из кэша страниц."""
+        self.client.get(reverse('posts:index'))
+        timing = self.timing(self.client.get(reverse('posts:index')))
+        self.assertNotIn('hit=0', timing['cache'])
+
+    def test_metrics_aggregated_per_view(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(self.staff)
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text,
+        )
+        self.assertIn('yatube_db_queries_bucket{view="posts:index"', text)
+        self.assertIn('yatube_cache_misses_total{view="posts:index"}', text)
+
+    def test_metrics_for_staff_only(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILE_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def saved(self, view):
+        return os.listdir(view_directory(view))
+
+    def test_not_profiled_by_default(self):
+        self.client.get(reverse('posts:index'))
+        self.assertFalse(os.path.exists(view_directory('posts:index')))
+
+    def test_signed_header_profiles_request(self):
+        self.client.get(
+            reverse('posts:index'), HTTP_X_PROFILE=make_token('staff'))
+        self.assertEqual(len(self.saved('posts:index')), 1)
+
+    def test_forged_header_ignored(self):
+        self.client.get(reverse('posts:index'), HTTP_X_PROFILE='staff:x:y')
+        self.assertFalse(os.path.exists(view_directory('posts:index')))
+
+    @override_settings(PROFILE_SAMPLE_RATE=1.0, PROFILE_KEEP=2)
+    def test_ring_buffer_keeps_last_profiles(self):
+        for _ in range(4):
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(len(self.saved('posts:index')), 2)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1.0)
+    def test_profile_report(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:author'))
+        out = StringIO()
+        call_command('profile_report', view='posts', top=5, stdout=out)
+        report = out.getvalue()
+        self.assertIn('posts.index: профилей 1', report)
+        self.assertNotIn('about', report)
+
+
+class SlowQueryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        slow_log.reset()
+
+    def test_fingerprint_hides_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a IN (%s, %s, %s) "
+                        "AND b = 'x'  LIMIT 10"),
+            'SELECT * FROM t WHERE a IN (...) AND b = ? LIMIT ?',
+        )
+
+    def test_full_scan_detection(self):
+        self.assertEqual(full_scans(['SCAN posts_post']), ['SCAN posts_post'])
+        self.assertEqual(
+            full_scans(['SCAN posts_post USING INDEX posts_post_pub_date']),
+            [],
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_logged_with_plan_and_view(self):
+        with self.assertLogs(SLOW_QUERIES_LOGGER, 'WARNING'):
+            self.client.get(reverse('posts:search'), {'q': 'пост'})
+        worst = slow_log.worst()
+        self.assertTrue(worst)
+        self.assertTrue(all(query['views'] == ['posts:search']
+                            for query in worst))
+        self.assertTrue(any(query['plan'] for query in worst))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_full_table_scan_flagged(self):
+        """Поиск подстроки без индекса читает всю таблицу."""
+        with self.assertLogs(SLOW_QUERIES_LOGGER, 'WARNING') as logs:
+            with logging_slow_queries():
+                list(User.objects.filter(first_name__contains='а'))
+        self.assertIn('полный просмотр таблицы', logs.output[0])
+        self.assertEqual(slow_log.worst()[0]['views'], ['вне запроса'])
+
+    def test_wrappers_removed_after_requests(self):
+        """Обёртки execute не копятся от запроса к запросу."""
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        for alias in connections:
+            self.assertEqual(connections[alias].execute_wrappers, [])
+
+    def test_fast_queries_not_logged(self):
+        list(User.objects.all())
+        self.assertEqual(slow_log.worst(), [])
+
+
+class DatabaseTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234,
+                                       'cache_size': -2048})
+    def test_pragmas_applied(self):
+        apply_pragmas(sender=None, connection=connection)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+        self.assertEqual(self.pragma('cache_size'), -2048)
+
+    def test_dead_persistent_connection_closed(self):
+        """Соединение с CONN_MAX_AGE, не прошедшее проверку, закрывается."""
+        with mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=60), \
+                mock.patch.object(connection, 'errors_occurred', True), \
+                mock.patch.object(connection, 'is_usable',
+                                  return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            check_connections()
+        close.assert_called_once()
+
+    def test_healthy_connection_not_checked(self):
+        """Соединение без ошибок не проверяется на каждом запросе."""
+        with mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=60), \
+                mock.patch.object(connection, 'is_usable') as is_usable:
+            check_connections()
+        is_usable.assert_not_called()
+
+    def test_short_lived_connection_not_checked(self):
+        with mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=0), \
+                mock.patch.object(connection, 'errors_occurred', True), \
+                mock.patch.object(connection, 'is_usable') as is_usable:
+            check_connections()
+        is_usable.assert_not_called()
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        forget_writes()
+        self.router = ReplicaRouter()
+
+    def route_read(self):
+        with mock.patch.object(connection, 'in_atomic_block', False):
+            return self.router.db_for_read(User)
+
+    def test_reads_go_to_replica_inside_block(self):
+        self.assertEqual(self.route_read(), 'default')
+        with reading_from_replica():
+            self.assertEqual(self.route_read(), 'replica')
+
+    def test_reads_after_write_stay_on_primary(self):
+        with reading_from_replica():
+            self.assertEqual(self.router.db_for_write(User), 'default')
+            self.assertEqual(self.route_read(), 'default')
+
+    def test_reads_in_transaction_stay_on_primary(self):
+        with reading_from_replica():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_writer_pinned_to_primary(self):
+        """Автор нового поста какое-то время читает с основной базы."""
+        user = User.objects.create_user(username='writer')
+        self.client.force_login(user)
+        self.client.post(reverse('posts:post_create'), {'text': 'Пост'})
+        self.assertTrue(cache.get(pin_key(user.pk)))
+
+    def test_reader_not_pinned(self):
+        user = User.objects.create_user(username='reader')
+        self.client.force_login(user)
+        self.client.get(reverse('posts:index'))
+        self.assertIsNone(cache.get(pin_key(user.pk)))
+
+    def test_copy_database(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'replica.sqlite3')
+        copy_database(connections['default'], path)
+        with sqlite3.connect(path) as replica:
+            tables = {name for name, in replica.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertIn('posts_post', tables)
+
+
+class TieredCacheTest(TestCase):
+    def setUp(self):
+        descriptor, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(descriptor)
+        self.cache = TieredCache(self.path, {'OPTIONS': {'WAIT_TIMEOUT': 2}})
+        self.computed = 0
+
+    def tearDown(self):
+        for name in (self.path, self.path + '-wal', self.path + '-shm'):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def compute(self, value='новое', delay=0):
+        def compute():
+            self.computed += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_backend_api(self):
+        self.cache.set('key', {'a': 1}, 60)
+        self.assertEqual(self.cache.get('key'), {'a': 1})
+        self.assertFalse(self.cache.add('key', 'другое'))
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertEqual(self.cache.incr('counter'), 2)
+        self.assertEqual(self.cache.get('counter'), 2)
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('key')
+
+    def test_second_level_is_shared(self):
+        """Запись видна через L2 после ухода из L1."""
+        self.cache.set('key', 'значение', 60)
+        self.cache._l1.clear()
+        other = TieredCache(self.path, {})
+        self.assertEqual(other.get('key'), 'значение')
+
+    def test_expired_value_is_missing(self):
+        self.cache.set('key', 'значение', 1)
+        with mock.patch('core.caching.time.time',
+                        return_value=time.time() + 2):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'новое'))
+
+    def test_single_flight(self):
+        """Пустой ключ пересчитывает один поток, остальные ждут его."""
+        results = []
+
+        def worker():
+            results.append(self.cache.get_or_compute(
+                'key', self.compute(delay=0.3), 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['новое'] * 5)
+        self.assertEqual(self.computed, 1)
+
+    def test_stale_while_revalidate(self):
+        """Пока один пересчитывает, остальным отдаётся прежнее значение."""
+        self.cache.get_or_compute('key', self.compute('старое'), 1)
+        key = self.cache.make_key('key')
+        with mock.patch('core.caching.time.time',
+                        return_value=time.time() + 2):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache._acquire(key))
+            self.assertEqual(
+                self.cache.get_or_compute('key', self.compute(), 1), 'старое')
+            self.cache._release(key)
+            self.assertEqual(
+                self.cache.get_or_compute('key', self.compute(), 60), 'новое')
+        self.assertEqual(self.computed, 2)
+
+    def test_early_recompute(self):
+        """Дорогое значение пересчитывается до срока (XFetch)."""
+        key = self.cache.make_key('key')
+        self.cache._store(key, 'старое', 20, delta=10)
+        with mock.patch('core.caching.random.random', return_value=0.0):
+            self.assertEqual(
+                self.cache.get_or_compute('key', self.compute(), 20),
+                'старое')
+        with mock.patch('core.caching.random.random', return_value=0.99):
+            self.assertEqual(
+                self.cache.get_or_compute('key', self.compute(), 20),
+                'новое')
+        self.assertEqual(self.computed, 1)
+
+    def test_helper_falls_back_to_plain_backend(self):
+        """Без get_or_compute у бэкенда помощник обходится get/set."""
+        plain = LocMemCache('plain', {})
+        for _ in range(2):
+            self.assertEqual(
+                get_or_compute(plain, 'key', self.compute(), 60), 'новое')
+        self.assertEqual(self.computed, 1)
+        get_or_compute(plain, 'skip', self.compute(), 60,
+                       cacheable=lambda value: False)
+        self.assertFalse(plain.has_key('skip'))
+
+    def test_cull_keeps_locks(self):
+        """Переполнение не снимает замки пересчёта."""
+        cache = TieredCache(self.path, {
+            'OPTIONS': {'MAX_ENTRIES': 4, 'CULL_FREQUENCY': 2}})
+        self.assertTrue(cache._acquire('key'))
+        for number in range(5):
+            cache.set(f'key{number}', number, 60)
+        cache._cull()
+        cache._l1.clear()
+        self.assertFalse(cache._acquire('key'))
+        self.assertIsNone(cache.get('key0'))
+
+    def test_uncacheable_value_is_not_stored(self):
+        self.cache.get_or_compute(
+            'key', self.compute(), 60, cacheable=lambda value: False)
+        self.assertIsNone(self.cache.get('key'))
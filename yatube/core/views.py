@@ -1,5 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from .metrics import registry
+from .slow_queries import slow_log
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +20,25 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def metrics(request):
+    """Метрики процесса в формате Prometheus, только для сотрудников."""
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def slow_queries(request):
+    """Самые тяжёлые медленные запросы процесса, ?limit=<n>."""
+    try:
+        limit = int(request.GET.get('limit', 20))
+    except ValueError:
+        limit = 20
+    return JsonResponse(
+        {'queries': slow_log.worst(limit)},
+        json_dumps_params={'ensure_ascii': False},
+    )
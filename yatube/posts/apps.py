@@ -1,5 +1,16 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_schema(sender, using, **kwargs):
+    from .search import repair_search_schema
+    repair_search_schema(connections[using])
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import holes, signals  # noqa: F401
+        post_migrate.connect(ensure_search_schema, sender=self)
@@ -0,0 +1,90 @@
+import hashlib
+
+from django.views.decorators.http import condition
+
+from . import entities, feed, versions
+from .models import Post
+
+
+def viewer_key(request):
+    user = request.user
+    return f'user:{user.pk}' if user.is_authenticated else 'anonymous'
+
+
+def feed_condition(scopes_for):
+    """Отвечает 304 по поколениям лент, не вызывая view.
+
+    scopes_for(request, **kwargs) возвращает список лент, от которых
+    зависит страница, или None, если объекта нет (тогда view сама
+    ответит 404). ETag слабый: токен CSRF в форме меняется от рендера
+    к рендеру, хотя смысл страницы тот же.
+    """
+    def get_scopes(request, *args, **kwargs):
+        if not hasattr(request, '_feed_scopes'):
+            request._feed_scopes = scopes_for(request, *args, **kwargs)
+        return request._feed_scopes
+
+    def etag(request, *args, **kwargs):
+        scopes = get_scopes(request, *args, **kwargs)
+        if scopes is None:
+            return None
+        current = versions.get_versions(*scopes)
+        state = ';'.join(
+            [viewer_key(request)]
+            + [f'{scope}={current[scope]}' for scope in sorted(current)]
+        )
+        return 'W/"{}"'.format(hashlib.md5(state.encode()).hexdigest())
+
+    def last_modified(request, *args, **kwargs):
+        scopes = get_scopes(request, *args, **kwargs)
+        if scopes is None:
+            return None
+        return versions.last_modified(*scopes)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def viewer_scopes(request):
+    if request.user.is_authenticated:
+        return [f'following:{request.user.pk}']
+    return []
+
+
+def index_scopes(request):
+    return ['index']
+
+
+def group_scopes(request, slug):
+    group = entities.get_group(slug)
+    if group is None:
+        return None
+    return [f'group:{group.pk}']
+
+
+def profile_scopes(request, username):
+    author = entities.get_user_by_username(username)
+    if author is None:
+        return None
+    author_id = author.pk
+    return [
+        f'author:{author_id}',
+        f'followers:{author_id}',
+        f'following:{author_id}',
+    ] + viewer_scopes(request)
+
+
+def post_scopes(request, post_id):
+    post = Post.objects.on_post_shard(post_id).filter(
+        pk=post_id,
+    ).values_list('author_id', 'group_id').first()
+    if post is None:
+        return None
+    author_id, group_id = post
+    scopes = [f'post:{post_id}', f'author:{author_id}']
+    if group_id is not None:
+        scopes.append(f'group:{group_id}')
+    return scopes
+
+
+def follow_scopes(request):
+    return viewer_scopes(request) + feed.feed_scopes(request.user)
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Post, User
+
+
+def count_of(model, field, outer='pk'):
+    """Подзапрос COUNT(*) строк model, ссылающихся на внешнюю строку."""
+    rows = model.objects.filter(**{field: OuterRef(outer)}).order_by()
+    return Coalesce(
+        Subquery(rows.values(field).annotate(total=Count('pk'))
+                 .values('total')),
+        0,
+    )
+
+
+def author_counts(user_id):
+    return {
+        'posts_count': Post.objects.on_author_shard(user_id).filter(
+            author_id=user_id).count(),
+        'followers_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def change_author_stats(user_id, create=True, **deltas):
+    """Сдвигает счётчики автора выражениями F().
+
+    Если строки счётчиков ещё нет, она создаётся пересчётом — кроме
+    удаления, при котором автор может удаляться вместе с ней.
+    """
+    updates = {name: F(name) + delta for name, delta in deltas.items()}
+    with transaction.atomic():
+        updated = AuthorStats.objects.filter(
+            user_id=user_id,
+        ).update(**updates)
+        if not updated and create:
+            AuthorStats.objects.update_or_create(
+                user_id=user_id,
+                defaults=author_counts(user_id),
+            )
+
+
+def change_comments_count(post_id, delta):
+    Post.objects.on_post_shard(post_id).filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta,
+    )
+
+
+def recount_authors():
+    """Создаёт недостающие строки счётчиков и чинит расхождения.
+
+    Возвращает число исправленных строк.
+    """
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True,
+    )
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=pk) for pk in missing.iterator()],
+    )
+    counts = {
+        'posts_count': count_of(Post, 'author', 'user'),
+        'followers_count': count_of(Follow, 'author', 'user'),
+        'following_count': count_of(Follow, 'user', 'user'),
+    }
+    drifted = AuthorStats.objects.annotate(
+        **{f'actual_{name}': value for name, value in counts.items()},
+    ).exclude(
+        **{name: F(f'actual_{name}') for name in counts},
+    ).values_list('pk', flat=True)
+    with transaction.atomic():
+        return AuthorStats.objects.filter(
+            pk__in=list(drifted),
+        ).update(**counts)
+
+
+def recount_comments():
+    drifted = Post.objects.annotate(
+        actual=count_of(Comment, 'post'),
+    ).exclude(comments_count=F('actual')).values_list('pk', flat=True)
+    with transaction.atomic():
+        return Post.objects.filter(pk__in=list(drifted)).update(
+            comments_count=count_of(Comment, 'post'),
+        )
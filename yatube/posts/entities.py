@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import Http404
+
+from .models import Group, User
+
+
+def user_key(pk):
+    return f'entity:user:{pk}'
+
+
+def username_key(username):
+    return f'entity:username:{username}'
+
+
+def group_key(slug):
+    return f'entity:group:{slug}'
+
+
+def load(queryset, **lookup):
+    """Читает строку с основной базы: реплика могла бы отдать старую."""
+    return queryset.using(DEFAULT_DB_ALIAS).filter(**lookup).first()
+
+
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields
+               if field.attname != 'password']
+
+
+def pack_user(user):
+    """Поля пользователя для кэша: хеш пароля на диск не попадает."""
+    return {name: getattr(user, name) for name in USER_FIELDS}
+
+
+def unpack_user(fields):
+    """Собирает пользователя с отложенным паролем.
+
+    Пароль подгрузится из базы при обращении — например, при сверке
+    хеша сессии, — а save() запишет только загруженные поля и не
+    затрёт его.
+    """
+    return User.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+
+
+def get_user(pk):
+    """Пользователь по pk из кэша или None, если его нет."""
+    fields = cache.get(user_key(pk))
+    if fields is not None:
+        return unpack_user(fields)
+    user = load(User.objects, pk=pk)
+    if user is not None:
+        cache.set(user_key(pk), pack_user(user),
+                  settings.ENTITY_CACHE_TIMEOUT)
+    return user
+
+
+def get_user_by_username(username):
+    """Имя в кэше указывает на pk, сам пользователь лежит под get_user."""
+    pk = cache.get(username_key(username))
+    if pk is not None:
+        return get_user(pk)
+    user = load(User.objects, username=username)
+    if user is not None:
+        cache.set_many({
+            username_key(username): user.pk,
+            user_key(user.pk): pack_user(user),
+        }, settings.ENTITY_CACHE_TIMEOUT)
+    return user
+
+
+def get_group(slug):
+    group = cache.get(group_key(slug))
+    if group is None:
+        group = load(Group.objects, slug=slug)
+        if group is not None:
+            cache.set(group_key(slug), group, settings.ENTITY_CACHE_TIMEOUT)
+    return group
+
+
+def user_or_404(username):
+    user = get_user_by_username(username)
+    if user is None:
+        raise Http404
+    return user
+
+
+def group_or_404(slug):
+    group = get_group(slug)
+    if group is None:
+        raise Http404
+    return group
+
+
+def forget(*keys):
+    """Сбрасывает записи сразу и ещё раз после коммита.
+
+    Второй сброс убирает копию, которую параллельный запрос успел
+    прочитать до коммита и положить в кэш.
+    """
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget_user(user, *usernames):
+    names = {user.username, *usernames} - {None, ''}
+    forget(user_key(user.pk), *(username_key(name) for name in names))
+
+
+def forget_group(*slugs):
+    forget(*(group_key(slug) for slug in set(slugs) - {None, ''}))
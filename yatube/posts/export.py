@@ -0,0 +1,110 @@
+import csv
+import heapq
+import json
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Group, Post
+
+CHUNK_SIZE: int = 2000
+
+EXPORTS = {
+    'groups': (Group, ('id', 'title', 'slug', 'description')),
+    'posts': (
+        Post,
+        ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+         'comments_count'),
+    ),
+    'comments': (
+        Comment, ('id', 'post_id', 'author_id', 'text', 'created'),
+    ),
+    'follows': (Follow, ('id', 'user_id', 'author_id')),
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_rows(name, since=0):
+    """Строки таблицы с id больше since, по возрастанию id.
+
+    values_list и iterator не создают объектов моделей и не держат
+    весь результат в памяти, поэтому память не зависит от размера
+    таблицы. Последний выгруженный id — отметка для следующей выгрузки.
+    Посты и комментарии читаются со всех шардов и сливаются по id.
+    """
+    model, fields = EXPORTS[name]
+    queryset = model.objects.filter(pk__gt=since).order_by('pk')
+    sources = (queryset.per_shard() if hasattr(queryset, 'per_shard')
+               else [queryset])
+    return heapq.merge(
+        *(source.values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+          for source in sources),
+        key=itemgetter(0),
+    )
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer, возвращающий строку."""
+
+    def write(self, value):
+        return value
+
+
+def render_ndjson(name, rows):
+    model, fields = EXPORTS[name]
+    label = model._meta.label_lower
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        record = dict(zip(fields, row))
+        yield encoder.encode({
+            'model': label,
+            'pk': record.pop('id'),
+            'fields': record,
+        }) + '\n'
+
+
+def render_csv(name, rows):
+    _, fields = EXPORTS[name]
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row
+        )
+
+
+def render(name, file_format, rows):
+    if file_format == 'csv':
+        return render_csv(name, rows)
+    return render_ndjson(name, rows)
+
+
+class HighWaterMark:
+    """Пропускает строки дальше, запоминая id последней из них."""
+
+    def __init__(self, rows, since=0):
+        self.rows = rows
+        self.last = since
+
+    def __iter__(self):
+        for row in self.rows:
+            self.last = row[0]
+            yield row
+
+
+def load_state(path):
+    try:
+        with open(path) as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(path, state):
+    with open(path, 'w') as state_file:
+        json.dump(state, state_file, indent=2, sort_keys=True)
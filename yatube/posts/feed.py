@@ -0,0 +1,227 @@
+import zlib
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Subquery
+
+from . import sharding, versions
+from .models import AuthorStats, FeedEntry, Follow, Post
+
+FEED_ORDERING = ('-feed_date', '-feed_id')
+
+
+def followers_count(author_id):
+    return AuthorStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True,
+    ).first() or 0
+
+
+def is_pull_author(author_id):
+    """Посты популярных авторов не раскладываются по лентам при записи.
+
+    С шардами по лентам не раскладывается ничего: строки ленты в
+    основной базе не могут ссылаться на посты в шардах.
+    """
+    if sharding.is_sharded():
+        return True
+    return followers_count(author_id) >= settings.FEED_PULL_THRESHOLD
+
+
+def pull_authors(user):
+    """Авторы из подписок пользователя, чьи посты читаются напрямую."""
+    return Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gte=settings.FEED_PULL_THRESHOLD,
+    ).values_list('author', flat=True)
+
+
+def feed_scope(user_id):
+    return f'feed:{user_id}'
+
+
+def direct_authors(user):
+    """Авторы, чьи посты лента читает напрямую, минуя FeedEntry."""
+    if sharding.is_sharded():
+        return Follow.objects.filter(user=user).values_list(
+            'author', flat=True)
+    return pull_authors(user)
+
+
+def feed_scopes(user):
+    """Поколения, от которых зависит лента подписок пользователя.
+
+    Материализованную часть описывает одно поколение feed:<id>, его
+    поднимают запись в ленту и правка разложенных постов. Авторы,
+    читаемые напрямую, добавляют свои author:<id>; их немного.
+    """
+    return [feed_scope(user.pk)] + [
+        f'author:{author_id}' for author_id in direct_authors(user)
+    ]
+
+
+def bump_followers(author_id):
+    """Поднимает поколения лент, в которые разложены посты автора."""
+    if is_pull_author(author_id):
+        return
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True)
+    versions.bump(*(feed_scope(user_id) for user_id in followers))
+
+
+def trim(user_id):
+    """Оставляет в ленте пользователя не больше FEED_MAX_ENTRIES записей."""
+    cutoff = FeedEntry.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-post_id',
+    ).values('pub_date')[settings.FEED_MAX_ENTRIES - 1:
+                         settings.FEED_MAX_ENTRIES]
+    FeedEntry.objects.filter(
+        user_id=user_id,
+        pub_date__lt=Subquery(cutoff),
+    ).delete()
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора.
+
+    Ленты обрезаются не при каждой записи, а примерно раз в
+    FEED_TRIM_EVERY постов, поэтому лимит может ненадолго превышаться.
+    """
+    if is_pull_author(post.author_id):
+        return
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id,
+    ).values_list('user_id', flat=True))
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in followers],
+        ignore_conflicts=True,
+    )
+    for user_id in followers:
+        bucket = zlib.crc32(f'{user_id}:{post.pk}'.encode())
+        if bucket % settings.FEED_TRIM_EVERY == 0:
+            trim(user_id)
+
+
+def latest_posts(author_id):
+    return list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date',
+    ).values_list('pk', 'pub_date')[:settings.FEED_MAX_ENTRIES])
+
+
+def copy_posts(user_id, posts):
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts],
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+    versions.bump(feed_scope(user_id))
+
+
+def backfill(user_id, author_id):
+    """Переносит свежие посты автора в ленту нового подписчика."""
+    if is_pull_author(author_id):
+        return
+    copy_posts(user_id, latest_posts(author_id))
+
+
+def unfollowed(author_id):
+    """Проверяет, не перестал ли автор быть pull-автором после отписки.
+
+    Посты, написанные в pull-режиме, в ленты не раскладывались, а после
+    перехода порога pull_authors их больше не вернёт, поэтому ленты
+    оставшихся подписчиков дополняются ими. Вызывается в транзакции
+    уменьшения счётчика: прочитанное значение — результат именно этой
+    отписки, и переход порога замечает ровно одна из них.
+    """
+    if sharding.is_sharded():
+        return
+    if followers_count(author_id) != settings.FEED_PULL_THRESHOLD - 1:
+        return
+    posts = latest_posts(author_id)
+    for user_id in Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True):
+        copy_posts(user_id, posts)
+
+
+def remove(user_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id,
+    ).delete()
+    versions.bump(feed_scope(user_id))
+
+
+def rebuild():
+    """Собирает все ленты заново одним INSERT ... SELECT.
+
+    Нужна после массовой загрузки, когда сигналы не срабатывали.
+    Счётчики подписчиков должны быть уже пересчитаны: по ним
+    отделяются авторы, чьи посты читаются напрямую.
+    """
+    sql = f'''
+        INSERT INTO {FeedEntry._meta.db_table} (user_id, post_id, pub_date)
+        SELECT user_id, post_id, pub_date FROM (
+            SELECT follow.user_id, post.id AS post_id, post.pub_date,
+                ROW_NUMBER() OVER (
+                    PARTITION BY follow.user_id
+                    ORDER BY post.pub_date DESC, post.id DESC
+                ) AS position
+            FROM (
+                SELECT DISTINCT user_id, author_id
+                FROM {Follow._meta.db_table}
+            ) AS follow
+            JOIN {Post._meta.db_table} AS post
+                ON post.author_id = follow.author_id
+            JOIN {AuthorStats._meta.db_table} AS stats
+                ON stats.user_id = follow.author_id
+            WHERE stats.followers_count < %s
+        ) AS ranked
+        WHERE position <= %s
+    '''
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                settings.FEED_PULL_THRESHOLD, settings.FEED_MAX_ENTRIES,
+            ])
+            return cursor.rowcount
+
+
+def feed_sources(user):
+    """Querysets ленты подписок: материализованная часть и pull-часть.
+
+    Их объединяет CursorPaginator, выбирая из каждого не больше
+    страницы строк. Ключ сортировки — FEED_ORDERING: материализованная
+    часть берёт его из столбцов FeedEntry и читается по индексу
+    (user, -pub_date, -post) без сортировки.
+    """
+    posts = Post.objects.with_related('author', 'group')
+    if sharding.is_sharded():
+        return sharded_feed_sources(posts, user)
+    sources = [posts.filter(feed_entries__user=user).annotate(
+        feed_date=F('feed_entries__pub_date'),
+        feed_id=F('feed_entries__post_id'),
+    )]
+    authors = list(pull_authors(user))
+    if authors:
+        sources.append(read_directly(posts.filter(author__in=authors)))
+    return sources
+
+
+def read_directly(posts):
+    """Посты, читаемые мимо FeedEntry, с ключом FEED_ORDERING."""
+    return posts.annotate(feed_date=F('pub_date'), feed_id=F('id'))
+
+
+def sharded_feed_sources(posts, user):
+    """С шардами лента целиком читается напрямую, по запросу на шард."""
+    authors = Follow.objects.filter(user=user).values_list(
+        'author', flat=True)
+    groups = sharding.authors_by_shard(authors)
+    if not groups:
+        return [read_directly(posts.none())]
+    return [
+        read_directly(posts.using(alias).filter(author__in=author_ids))
+        for alias, author_ids in groups.items()
+    ]
@@ -0,0 +1,44 @@
+from django.template.loader import render_to_string
+
+from core.holes import register
+
+from .forms import CommentForm
+from .models import Follow
+
+
+@register('follow_button')
+def follow_button(request, username):
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user,
+        author__username=username,
+    ).exists()
+    return render_to_string(
+        'posts/includes/follow_button.html',
+        {'username': username, 'following': following},
+        request=request,
+    )
+
+
+@register('switcher')
+def switcher(request, active):
+    """Вкладки лент; видны только пользователям с входом."""
+    return render_to_string(
+        'includes/switcher.html', {active: True}, request=request)
+
+
+@register('edit_link')
+def edit_link(request, post_id, author_id):
+    return render_to_string(
+        'posts/includes/edit_link.html',
+        {'post_id': post_id, 'author_id': author_id},
+        request=request,
+    )
+
+
+@register('comment_form')
+def comment_form(request, post_id):
+    return render_to_string(
+        'posts/includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()},
+        request=request,
+    )
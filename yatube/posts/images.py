@@ -0,0 +1,71 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+
+def normalize_upload(upload):
+    """Поворачивает картинку по EXIF, ограничивает размер и убирает метаданные.
+
+    Анимированные картинки возвращаются как есть, чтобы не потерять
+    кадры.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    image_format = image.format
+    if getattr(image, 'is_animated', False):
+        upload.seek(0)
+        return upload
+    image = ImageOps.exif_transpose(image)
+    limit = settings.IMAGE_MAX_SIDE
+    image.thumbnail((limit, limit))
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    content = BytesIO()
+    image.save(content, image_format, **SAVE_OPTIONS.get(image_format, {}))
+    return SimpleUploadedFile(
+        upload.name,
+        content.getvalue(),
+        getattr(upload, 'content_type', None),
+    )
+
+
+def picture_key(name):
+    """Ключ готовых адресов миниатюр картинки для всех размеров.
+
+    Имя картинки — хэш её содержимого, поэтому запись не устаревает,
+    пока блоб не удалён.
+    """
+    return f'picture:{name}'
+
+
+def variant_presets(geometry):
+    """Пресеты sorl-thumbnail для srcset карточки с размерами geometry.
+
+    Ширины берутся из IMAGE_VARIANT_WIDTHS с теми же пропорциями,
+    каждая ширина строится во всех форматах IMAGE_VARIANT_FORMATS.
+    """
+    width, height = (int(side) for side in geometry.split('x'))
+    presets = []
+    for variant_width in settings.IMAGE_VARIANT_WIDTHS:
+        variant_height = round(variant_width * height / width)
+        for image_format in settings.IMAGE_VARIANT_FORMATS:
+            presets.append((
+                f'{variant_width}x{variant_height}',
+                {'crop': 'center', 'format': image_format, 'quality': 80},
+            ))
+    return presets
+
+
+def all_presets():
+    presets = list(settings.THUMBNAIL_PRESETS)
+    for geometry in settings.IMAGE_CARD_GEOMETRIES:
+        presets.extend(variant_presets(geometry))
+    return presets
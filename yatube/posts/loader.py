@@ -0,0 +1,304 @@
+import json
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, groupby, islice
+
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+from faker import Faker
+
+from . import counters, feed, search
+from .models import AuthorStats, Comment, FeedEntry, Follow, Group, Post, User
+
+BATCH_SIZE: int = 5000
+
+LOADED_MODELS = (User, AuthorStats, Group, Post, Comment, Follow, FeedEntry)
+
+USER_FIELDS = ('author_id', 'user_id')
+
+
+class Progress:
+    """Печатает, сколько строк загружено и с какой скоростью."""
+
+    def __init__(self, write):
+        self.write = write
+
+    def start(self, label, total=None):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+
+    def advance(self, count):
+        self.done += count
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        total = f' из {self.total}' if self.total else ''
+        self.write(
+            f'{self.label}: {self.done}{total} '
+            f'({self.done / elapsed:.0f} строк/с)'
+        )
+
+
+def batches(objects, size):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert(model, objects, progress, batch_size=BATCH_SIZE):
+    """bulk_create пачками, каждая пачка в своей транзакции."""
+    for batch in batches(objects, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        progress.advance(len(batch))
+
+
+@contextmanager
+def preserved_dates():
+    """Отключает auto_now_add, чтобы bulk_create не затёр даты."""
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created'),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+@contextmanager
+def deferred_indexes():
+    """Снимает вторичные индексы и триггеры поиска на время загрузки.
+
+    Индексы строятся заново один раз в конце, а не обновляются на
+    каждую вставку. Уникальные индексы остаются: они проверяют данные.
+    Работает только на SQLite, на других СУБД ничего не делает.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    tables = [model._meta.db_table for model in LOADED_MODELS]
+    placeholders = ', '.join(['%s'] * len(tables))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            f"AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%' "
+            f"AND tbl_name IN ({placeholders})",
+            tables,
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    has_search = 'posts_post_fts' in connection.introspection.table_names()
+    if has_search:
+        search.drop_search_schema(connection)
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+        if has_search:
+            search.create_search_schema(connection)
+
+
+def finish(progress):
+    """Досчитывает то, что при обычной записи делают сигналы."""
+    progress.start('Счётчики')
+    progress.advance(counters.recount_authors() + counters.recount_comments())
+    progress.start('Ленты')
+    progress.advance(feed.rebuild())
+    cache.clear()
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def placeholder_user(pk):
+    return User(
+        pk=pk,
+        username=f'imported-{pk}',
+        password=make_password(None),
+    )
+
+
+def create_missing_users(objects):
+    """Заводит пользователей, на которых ссылаются строки из файла."""
+    referenced = {
+        getattr(obj, name) for obj in objects for name in USER_FIELDS
+        if hasattr(obj, name)
+    }
+    existing = set(User.objects.filter(pk__in=referenced).values_list(
+        'pk', flat=True))
+    User.objects.bulk_create(
+        [placeholder_user(pk) for pk in referenced - existing])
+
+
+def read_ndjson(stream):
+    """Объекты моделей из записей формата export_yatube.
+
+    Записи одной модели, идущие подряд, отдаются одной группой.
+    """
+    records = (json.loads(line) for line in stream if line.strip())
+    for label, group in groupby(records, key=lambda record: record['model']):
+        model = apps.get_model(label)
+        yield model, (
+            model(pk=record['pk'], **record['fields']) for record in group
+        )
+
+
+def load_ndjson(stream, progress, batch_size=BATCH_SIZE):
+    with preserved_dates(), deferred_indexes():
+        for model, objects in read_ndjson(stream):
+            progress.start(model._meta.verbose_name_plural)
+            for batch in batches(objects, batch_size):
+                with transaction.atomic():
+                    if model is not User:
+                        create_missing_users(batch)
+                    model.objects.bulk_create(batch)
+                progress.advance(len(batch))
+    finish(progress)
+
+
+class SyntheticData:
+    """Правдоподобный набор данных с тяжёлым хвостом популярности.
+
+    Авторы постов, комментариев и подписок выбираются по закону Ципфа
+    с показателем skew: немногие авторы получают большую часть
+    внимания, как в настоящих соцсетях.
+    """
+
+    def __init__(self, users, groups, posts, comments, follows_per_user,
+                 skew=1.1, days=365, seed=0):
+        self.counts = {
+            'users': users, 'groups': groups,
+            'posts': posts, 'comments': comments,
+        }
+        self.follows_per_user = follows_per_user
+        self.days = days
+        self.random = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.first_user = next_id(User)
+        self.first_group = next_id(Group)
+        self.first_post = next_id(Post)
+        self.first_comment = next_id(Comment)
+        self.first_follow = next_id(Follow)
+        self.user_weights = list(accumulate(
+            1 / rank ** skew for rank in range(1, users + 1)))
+        self.post_dates = array('d')
+        self.now = datetime.now(timezone.utc)
+
+    def popular_users(self, k):
+        return [
+            self.first_user + index for index in self.random.choices(
+                range(self.counts['users']),
+                cum_weights=self.user_weights,
+                k=k,
+            )
+        ]
+
+    def users(self):
+        password = make_password(None)
+        for offset in range(self.counts['users']):
+            pk = self.first_user + offset
+            yield User(
+                pk=pk,
+                username=f'{self.faker.user_name()}{pk}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password=password,
+            )
+
+    def groups(self):
+        for offset in range(self.counts['groups']):
+            pk = self.first_group + offset
+            yield Group(
+                pk=pk,
+                title=self.faker.sentence(nb_words=3)[:200],
+                slug=f'group-{pk}',
+                description=self.faker.paragraph(),
+            )
+
+    def posts(self):
+        span = self.days * 24 * 3600
+        remaining = self.counts['posts']
+        while remaining:
+            size = min(remaining, BATCH_SIZE)
+            authors = self.popular_users(size)
+            for author_id in authors:
+                pub_date = self.now - timedelta(
+                    seconds=self.random.uniform(0, span))
+                self.post_dates.append(pub_date.timestamp())
+                group_id = None
+                if self.counts['groups'] and self.random.random() < 0.7:
+                    group_id = self.first_group + self.random.randrange(
+                        self.counts['groups'])
+                yield Post(
+                    pk=self.first_post + len(self.post_dates) - 1,
+                    text=self.faker.paragraph(nb_sentences=5),
+                    author_id=author_id,
+                    group_id=group_id,
+                    pub_date=pub_date,
+                )
+            remaining -= size
+
+    def comments(self):
+        posts = len(self.post_dates)
+        remaining = self.counts['comments'] if posts else 0
+        pk = self.first_comment
+        while remaining:
+            size = min(remaining, BATCH_SIZE)
+            for author_id in self.popular_users(size):
+                offset = self.random.randrange(posts)
+                created = min(
+                    self.post_dates[offset]
+                    + self.random.uniform(0, 7 * 24 * 3600),
+                    self.now.timestamp(),
+                )
+                yield Comment(
+                    pk=pk,
+                    post_id=self.first_post + offset,
+                    author_id=author_id,
+                    text=self.faker.sentence(),
+                    created=datetime.fromtimestamp(created, timezone.utc),
+                )
+                pk += 1
+            remaining -= size
+
+    def follows(self):
+        pk = self.first_follow
+        for offset in range(self.counts['users']):
+            user_id = self.first_user + offset
+            wanted = self.random.randint(0, 2 * self.follows_per_user)
+            authors = set(self.popular_users(wanted)) - {user_id}
+            for author_id in sorted(authors):
+                yield Follow(pk=pk, user_id=user_id, author_id=author_id)
+                pk += 1
+
+    def load(self, progress, batch_size=BATCH_SIZE):
+        with preserved_dates(), deferred_indexes():
+            for label, model, objects, total in (
+                ('Пользователи', User, self.users(), self.counts['users']),
+                ('Группы', Group, self.groups(), self.counts['groups']),
+                ('Посты', Post, self.posts(), self.counts['posts']),
+                ('Комментарии', Comment, self.comments(),
+                 self.counts['comments']),
+                ('Подписки', Follow, self.follows(), None),
+            ):
+                progress.start(label, total)
+                insert(model, objects, progress, batch_size)
+        finish(progress)
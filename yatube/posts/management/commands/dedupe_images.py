@@ -0,0 +1,53 @@
+import os
+
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import delete
+
+from posts.models import Post
+from posts.sharding import require_single_database
+from posts.storage import content_name
+from posts.thumbnails import image_file
+
+BATCH_SIZE: int = 1000
+
+
+class Command(BaseCommand):
+    help = 'Переносит картинки постов в хранилище по хешу содержимого'
+
+    def handle(self, *args, **options):
+        require_single_database('Перенос картинок')
+        storage = Post._meta.get_field('image').storage
+        moved = 0
+        for name in self.legacy_names():
+            if not storage.exists(name):
+                continue
+            with storage.open(name) as content:
+                new_name = storage.save(name, content)
+            Post.objects.filter(image=name).update(image=new_name)
+            delete(image_file(name))
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено картинок: {moved}'
+        ))
+
+    @staticmethod
+    def legacy_names():
+        """Имена файлов, сохранённых до перехода на хеши содержимого."""
+        names = Post.objects.exclude(image='').order_by('image').values_list(
+            'image', flat=True,
+        ).distinct()
+        last = ''
+        while True:
+            batch = list(names.filter(image__gt=last)[:BATCH_SIZE])
+            if not batch:
+                return
+            for name in batch:
+                if not is_content_name(name):
+                    yield name
+            last = batch[-1]
+
+
+def is_content_name(name):
+    directory, filename = os.path.split(name)
+    stem, extension = os.path.splitext(filename)
+    return content_name(directory.split('/')[0], stem, extension) == name
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (EXPORTS, FORMATS, HighWaterMark, export_rows,
+                          load_state, render, save_state)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии и подписки потоком'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables', nargs='*', metavar='table',
+            help=f'Что выгружать: {", ".join(EXPORTS)} (по умолчанию всё)',
+        )
+        parser.add_argument(
+            '--format', choices=list(FORMATS), default='ndjson',
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout',
+        )
+        parser.add_argument(
+            '--state',
+            help='JSON с последними выгруженными id; выгружаются только '
+                 'более новые строки, файл обновляется после выгрузки',
+        )
+
+    def handle(self, *args, **options):
+        tables = options['tables'] or list(EXPORTS)
+        unknown = set(tables) - EXPORTS.keys()
+        if unknown:
+            raise CommandError(f'Неизвестные таблицы: {", ".join(unknown)}')
+        file_format = options['format']
+        if file_format == 'csv' and len(tables) != 1:
+            raise CommandError('CSV выгружается по одной таблице за раз')
+        state = load_state(options['state']) if options['state'] else {}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as output:
+                self.export(tables, file_format, state, output.write)
+        else:
+            self.export(
+                tables, file_format, state,
+                lambda chunk: self.stdout.write(chunk, ending=''),
+            )
+        if options['state']:
+            save_state(options['state'], state)
+        self.stderr.write(f'Выгружено до id: {state}')
+
+    @staticmethod
+    def export(tables, file_format, state, write):
+        for name in tables:
+            since = state.get(name, 0)
+            rows = HighWaterMark(export_rows(name, since), since)
+            for chunk in render(name, file_format, rows):
+                write(chunk)
+            state[name] = rows.last
@@ -0,0 +1,60 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.loader import BATCH_SIZE, Progress, SyntheticData, load_ndjson
+from posts.sharding import require_single_database
+
+
+class Command(BaseCommand):
+    help = ('Массово загружает данные из NDJSON (формат export_yatube) '
+            'или генерирует синтетический набор')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--input',
+            help='NDJSON-файл для загрузки; «-» — читать stdin',
+        )
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument(
+            '--follows-per-user', type=int, default=20,
+            help='Среднее число подписок пользователя',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для популярности авторов',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты постов',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        require_single_database('Загрузка')
+        progress = Progress(self.stdout.write)
+        if options['input']:
+            if options['input'] == '-':
+                load_ndjson(sys.stdin, progress, options['batch_size'])
+            else:
+                with open(options['input'], encoding='utf-8') as stream:
+                    load_ndjson(stream, progress, options['batch_size'])
+        else:
+            if not options['users'] and (
+                    options['posts'] or options['comments']):
+                raise CommandError('Для постов и комментариев нужны авторы')
+            SyntheticData(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows_per_user=options['follows_per_user'],
+                skew=options['skew'],
+                days=options['days'],
+                seed=options['seed'],
+            ).load(progress, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена'))
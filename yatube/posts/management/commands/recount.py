@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+from posts.sharding import require_single_database
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, подписок и комментариев'
+
+    def handle(self, *args, **options):
+        require_single_database('Пересчёт счётчиков')
+        authors = counters.recount_authors()
+        posts = counters.recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: авторов {authors}, постов {posts}'
+        ))
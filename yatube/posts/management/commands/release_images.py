@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.storage import blob_names
+from posts.thumbnails import release_image
+
+
+class Command(BaseCommand):
+    help = ('Удаляет блобы картинок, на которые не ссылается ни один пост '
+            'и которые старше IMAGE_RELEASE_GRACE')
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        released = sum(
+            release_image(name)
+            for name in blob_names(field.storage, field.upload_to)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено картинок: {released}'
+        ))
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.processes import setup_django
+from posts.models import Post
+from posts.sharding import require_single_database
+from posts.thumbnails import try_build_thumbnails
+
+BATCH_SIZE: int = 1000
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры для всех картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 — строить в текущем процессе',
+        )
+
+    def handle(self, *args, **options):
+        require_single_database('Построение миниатюр')
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True,
+        ).distinct()
+        workers = options['workers']
+        done = failed = 0
+        if not workers:
+            for name in names.iterator():
+                done += 1
+                failed += not try_build_thumbnails(name)
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=setup_django,
+                initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+            )
+            with pool:
+                for batch in self.batches(names):
+                    built = list(pool.map(try_build_thumbnails, batch))
+                    done += len(built)
+                    failed += built.count(False)
+                    self.stdout.write(f'Готово картинок: {done}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры построены для {done - failed} картинок'
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f'Не удалось построить для {failed} картинок, см. лог'
+            ))
+
+    @staticmethod
+    def batches(names):
+        last = ''
+        while True:
+            batch = list(
+                names.filter(image__gt=last).order_by('image')[:BATCH_SIZE]
+            )
+            if not batch:
+                return
+            yield batch
+            last = batch[-1]
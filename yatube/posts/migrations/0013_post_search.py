@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# DDL заморожен здесь: posts.search может меняться, а эта миграция —
+# нет. Триггеры после пересоздания таблиц чинит уже код приложения.
+CREATE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_ai "
+    "AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_ad "
+    "AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_au "
+    "AFTER UPDATE OF text ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_comment_fts USING fts5("
+    "text, content='posts_comment', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS posts_comment_fts_ai "
+    "AFTER INSERT ON posts_comment BEGIN "
+    "INSERT INTO posts_comment_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_comment_fts_ad "
+    "AFTER DELETE ON posts_comment BEGIN "
+    "INSERT INTO posts_comment_fts(posts_comment_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_comment_fts_au "
+    "AFTER UPDATE OF text ON posts_comment BEGIN "
+    "INSERT INTO posts_comment_fts(posts_comment_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO posts_comment_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "INSERT INTO posts_comment_fts(posts_comment_fts) VALUES ('rebuild')",
+]
+
+DROP_SCHEMA = [
+    'DROP TRIGGER IF EXISTS posts_post_fts_ai',
+    'DROP TRIGGER IF EXISTS posts_post_fts_ad',
+    'DROP TRIGGER IF EXISTS posts_post_fts_au',
+    'DROP TABLE IF EXISTS posts_post_fts',
+    'DROP TRIGGER IF EXISTS posts_comment_fts_ai',
+    'DROP TRIGGER IF EXISTS posts_comment_fts_ad',
+    'DROP TRIGGER IF EXISTS posts_comment_fts_au',
+    'DROP TABLE IF EXISTS posts_comment_fts',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_author_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE_SCHEMA), run(DROP_SCHEMA)),
+    ]
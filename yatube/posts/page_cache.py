@@ -0,0 +1,128 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from core.caching import get_or_compute
+from core.holes import fill_response
+
+from . import versions
+from .models import Group, User
+
+
+def path_scope(path):
+    return 'page:' + hashlib.md5(path.encode()).hexdigest()
+
+
+def page_key(request, prefix='page'):
+    """Ключ страницы: путь, его поколение и строка запроса.
+
+    Очистка по URL поднимает поколение пути, поэтому сбрасываются
+    сразу все варианты страницы с любыми параметрами курсора.
+    """
+    path = request.path
+    generation = versions.get_version(path_scope(path))
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode())
+    return f'{prefix}:{path_scope(path)}:{generation}:{query.hexdigest()}'
+
+
+def is_cacheable(request, response):
+    return (
+        request.method == 'GET'
+        and response.status_code == 200
+        and not response.cookies
+        and not response.streaming
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def cache_anonymous_page(view):
+    """Отдаёт гостям готовую страницу из кэша, не вызывая view."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        response = get_or_compute(
+            cache,
+            page_key(request),
+            lambda: view(request, *args, **kwargs),
+            settings.PAGE_CACHE_TIMEOUT,
+            cacheable=lambda response: is_cacheable(request, response),
+        )
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')),
+            response=response,
+        )
+    return wrapper
+
+
+def cache_page_body(view):
+    """Кэширует страницу, общую для всех пользователей.
+
+    View рисует страницу с метками вместо персональных фрагментов
+    (шапка, кнопка подписки, ссылка на правку, форма комментария).
+    Общая страница кэшируется один раз, а метки заполняются на каждый
+    запрос, поэтому пользователи с входом тоже не платят за рендер.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+
+        def render_body():
+            request.punch_holes = True
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                request.punch_holes = False
+
+        response = get_or_compute(
+            cache,
+            page_key(request, prefix='page-body'),
+            render_body,
+            settings.PAGE_CACHE_TIMEOUT,
+            cacheable=lambda response: is_cacheable(request, response),
+        )
+        if response.streaming or response.status_code != 200:
+            return response
+        return fill_response(request, response)
+    return wrapper
+
+
+def purge(*paths):
+    versions.bump(*(path_scope(path) for path in paths))
+
+
+def profile_paths(*user_ids):
+    return [
+        reverse('posts:profile', kwargs={'username': username})
+        for username in User.objects.filter(pk__in=user_ids).values_list(
+            'username', flat=True)
+    ]
+
+
+def group_paths(*slugs):
+    return [
+        reverse('posts:group_posts', kwargs={'slug': slug}) for slug in slugs
+    ]
+
+
+def purge_post_pages(post_id, author_id, group_ids=()):
+    """Сбрасывает страницы, на которых виден пост или его счётчики."""
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    purge(
+        reverse('posts:index'),
+        reverse('posts:post_detail', kwargs={'post_id': post_id}),
+        reverse('posts:post_comments', kwargs={'post_id': post_id}),
+        *profile_paths(author_id),
+        *group_paths(*slugs),
+    )
@@ -0,0 +1,239 @@
+import base64
+import heapq
+import json
+import math
+from collections.abc import Sequence
+from itertools import islice
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.db.models.query import QuerySet
+
+DEFAULT_ORDERING = ('-pub_date', '-id')
+
+MAX_PAGE_NUMBER: int = 10000
+
+SQLITE_INT_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа сортировки в непрозрачный токен."""
+    raw = json.dumps(
+        [value.isoformat() if hasattr(value, 'isoformat') else value
+         for value in values],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен, созданный encode_cursor."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    if not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values
+
+
+def is_cursor_value(value):
+    """Значение ключа, которое база примет как параметр запроса.
+
+    Целые вне int64 и Infinity/NaN из JSON приводят к OverflowError
+    при выполнении запроса, а не к ошибке разбора.
+    """
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return value in SQLITE_INT_RANGE
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, str)
+
+
+class CursorPage(Sequence):
+    """Страница ленты с токенами соседних страниц вместо номеров."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None,
+                 key=''):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.key = key
+
+    def __repr__(self):
+        return f'<CursorPage {self.key or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по ключу сортировки (по умолчанию pub_date, id).
+
+    Стоимость страницы не зависит от её глубины: вместо COUNT(*) и OFFSET
+    выбирается per_page + 1 строк после (или до) ключа из токена.
+    Можно передать несколько querysets одной модели — их строки сливаются
+    в одну ленту; все поля сортировки должны идти в одном направлении.
+    Полями сортировки могут быть и аннотации, общие для всех querysets.
+    """
+
+    def __init__(self, object_list, per_page, ordering=DEFAULT_ORDERING):
+        if isinstance(object_list, QuerySet):
+            object_list = [object_list]
+        self.sources = list(object_list)
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def get_page(self, params):
+        """Возвращает страницу по GET-параметрам after, before или page.
+
+        Испорченные токены и номера приводят к первой странице, как и в
+        Paginator.get_page.
+        """
+        try:
+            if params.get('after'):
+                return self.page_after(params['after'])
+            if params.get('before'):
+                return self.page_before(params['before'])
+            if params.get('page'):
+                return self.page_number(int(params['page']))
+        except (InvalidCursor, ValueError, TypeError, ValidationError):
+            pass
+        return self.page_number(1)
+
+    def page_after(self, token):
+        items = self._fetch(self._decode(token), reverse=False)
+        return self._build(
+            items[:self.per_page],
+            has_next=len(items) > self.per_page,
+            has_previous=True,
+            key=f'after:{token}',
+        )
+
+    def page_before(self, token):
+        items = self._fetch(self._decode(token), reverse=True)
+        has_previous = len(items) > self.per_page
+        return self._build(
+            items[:self.per_page][::-1],
+            has_next=True,
+            has_previous=has_previous,
+            key=f'before:{token}',
+        )
+
+    def page_number(self, number):
+        """Совместимость со ссылками вида ?page=N через OFFSET.
+
+        Номер ограничен MAX_PAGE_NUMBER: огромный OFFSET не влезает в
+        целое SQLite.
+        """
+        number = min(max(number, 1), MAX_PAGE_NUMBER)
+        offset = (number - 1) * self.per_page
+        items = self._fetch(None, reverse=False, offset=offset)
+        if not items and number > 1:
+            return self.page_number(1)
+        return self._build(
+            items[:self.per_page],
+            has_next=len(items) > self.per_page,
+            has_previous=number > 1,
+            key=f'page:{number}' if number > 1 else '',
+        )
+
+    def _build(self, items, has_next, has_previous, key):
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = encode_cursor(self._key(items[-1]))
+        if items and has_previous:
+            previous_cursor = encode_cursor(self._key(items[0]))
+        return CursorPage(items, next_cursor, previous_cursor, key)
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-'))
+                for name in self.ordering]
+
+    def _key(self, obj):
+        return [getattr(obj, self._attname(obj, name))
+                for name, _ in self._fields()]
+
+    @staticmethod
+    def _attname(obj, name):
+        try:
+            return obj._meta.get_field(name).attname
+        except FieldDoesNotExist:
+            return name
+
+    def _field(self, name):
+        """Поле модели или аннотация, по которой сортируются источники."""
+        queryset = self.sources[0]
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def _decode(self, token):
+        values = decode_cursor(token)
+        if len(values) != len(self.ordering) or not all(
+                map(is_cursor_value, values)):
+            raise InvalidCursor(token)
+        return [self._field(name).to_python(value)
+                for (name, _), value in zip(self._fields(), values)]
+
+    def _after(self, values, reverse):
+        """Q-условие «строго после ключа» в лексикографическом порядке."""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _order_by(self, reverse):
+        if not reverse:
+            return list(self.ordering)
+        return [name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering]
+
+    def _fetch(self, values, reverse, offset=0):
+        limit = offset + self.per_page + 1
+        querysets = []
+        for queryset in self.sources:
+            if values is not None:
+                queryset = queryset.filter(self._after(values, reverse))
+            querysets.append(queryset.order_by(*self._order_by(reverse)))
+        if len(querysets) == 1:
+            return list(querysets[0][offset:limit])
+        merged = heapq.merge(
+            *(queryset[:limit] for queryset in querysets),
+            key=self._sort_key,
+            reverse=self._fields()[0][1] != reverse,
+        )
+        return list(islice(self._unique(merged), offset, limit))
+
+    def _sort_key(self, obj):
+        return tuple(self._key(obj))
+
+    def _unique(self, items):
+        previous = None
+        for item in items:
+            key = self._sort_key(item)
+            if key != previous:
+                yield item
+            previous = key
@@ -0,0 +1,42 @@
+import time
+from functools import wraps
+
+from django.conf import settings
+
+from core.replicas import is_pinned, reading_from_replica, synced_at
+
+from . import versions
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def can_use_replica(request):
+    """Можно ли отдать страницу по данным реплики.
+
+    Нельзя, если пользователь недавно писал сам или если ленты страницы
+    (их считает feed_condition) менялись после того момента, до
+    которого sync_replica скопировал основную базу: иначе в кэш страниц
+    под новым поколением попала бы старая версия. View без лент
+    (например, поиск) читают с реплики, только если синхронизация была
+    не раньше REPLICA_STICKY_SECONDS назад.
+    """
+    if request.method not in SAFE_METHODS or is_pinned(request.user):
+        return False
+    synced = synced_at()
+    if synced is None:
+        return False
+    scopes = getattr(request, '_feed_scopes', None)
+    if scopes:
+        return versions.last_modified(*scopes).timestamp() < synced
+    return time.time() - synced < settings.REPLICA_STICKY_SECONDS
+
+
+def replica_reads(view):
+    """Читает данные ленты с реплики, когда это безопасно."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.REPLICA_DATABASES or not can_use_replica(request):
+            return view(request, *args, **kwargs)
+        with reading_from_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,209 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from . import sharding
+from .models import Post
+from .paginator import (CursorPage, CursorPaginator, InvalidCursor,
+                        decode_cursor, encode_cursor, is_cursor_value)
+
+COMMENT_WEIGHT: float = 0.5
+
+INDEXED_TABLES = {
+    'posts_post_fts': 'posts_post',
+    'posts_comment_fts': 'posts_comment',
+}
+
+SEARCH_SQL = '''
+    SELECT post_id, MIN(rank) AS rank FROM (
+        SELECT rowid AS post_id, bm25(posts_post_fts) AS rank
+        FROM posts_post_fts
+        WHERE posts_post_fts MATCH %s
+        UNION ALL
+        SELECT comment.post_id, bm25(posts_comment_fts) * %s AS rank
+        FROM posts_comment_fts
+        JOIN posts_comment AS comment
+            ON comment.id = posts_comment_fts.rowid
+        WHERE posts_comment_fts MATCH %s
+    )
+    GROUP BY post_id
+'''
+
+
+def schema_statements(fts_table, table):
+    """DDL индекса FTS5 над колонкой text и триггеров синхронизации."""
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"text, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai "
+        f"AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, text) VALUES (new.id, new.text); "
+        f"END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad "
+        f"AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, text) "
+        f"VALUES ('delete', old.id, old.text); "
+        f"END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au "
+        f"AFTER UPDATE OF text ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, text) "
+        f"VALUES ('delete', old.id, old.text); "
+        f"INSERT INTO {fts_table}(rowid, text) VALUES (new.id, new.text); "
+        f"END",
+    ]
+
+
+def create_search_schema(using_connection):
+    """Создаёт индексы и триггеры, которых не хватает.
+
+    Индекс перестраивается, только если что-то пришлось создать заново.
+    """
+    if using_connection.vendor != 'sqlite':
+        return
+    with using_connection.cursor() as cursor:
+        for fts_table, table in INDEXED_TABLES.items():
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name LIKE %s",
+                [f'{fts_table}%'],
+            )
+            before = cursor.fetchone()[0]
+            for statement in schema_statements(fts_table, table):
+                cursor.execute(statement)
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name LIKE %s",
+                [f'{fts_table}%'],
+            )
+            if cursor.fetchone()[0] != before:
+                cursor.execute(
+                    f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"
+                )
+
+
+def repair_search_schema(using_connection):
+    """Восстанавливает триггеры после migrate.
+
+    SQLite теряет триггеры, когда миграция пересоздаёт таблицу постов
+    или комментариев. Если индекса нет (миграция не применена или
+    откачена), ничего не делает.
+    """
+    if using_connection.vendor != 'sqlite':
+        return
+    if 'posts_post_fts' in using_connection.introspection.table_names():
+        create_search_schema(using_connection)
+
+
+def drop_search_schema(using_connection):
+    if using_connection.vendor != 'sqlite':
+        return
+    with using_connection.cursor() as cursor:
+        for fts_table in INDEXED_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {fts_table}')
+
+
+def build_match(query):
+    """Переводит ввод пользователя в безопасное выражение MATCH.
+
+    Каждое слово берётся в кавычки, слово со звёздочкой на конце
+    превращается в префиксный запрос.
+    """
+    return ' '.join(
+        f'"{word}"{star}' for word, star in re.findall(r'(\w+)(\*?)', query)
+    )
+
+
+def matching_post_ids(query):
+    """Подзапрос id постов, текст которых подходит под запрос."""
+    return RawSQL(
+        'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s',
+        [build_match(query)],
+    )
+
+
+def search_queryset():
+    return Post.objects.with_related('author', 'group')
+
+
+class PostSearch:
+    """Ранжированный поиск по постам и комментариям к ним.
+
+    Страницы листаются по ключу (rank, post_id) так же, как ленты
+    листаются по (pub_date, id). С шардами запрос идёт в индекс каждого
+    шарда, а строки сливаются по тому же ключу; bm25 считается по
+    статистике своего шарда, поэтому ранги сравнимы лишь приближённо.
+    """
+
+    def __init__(self, query, per_page):
+        self.match = build_match(query)
+        self.query = query
+        self.per_page = per_page
+
+    def get_page(self, params):
+        if not self.match:
+            return CursorPage([])
+        if connection.vendor != 'sqlite':
+            return self._fallback().get_page(params)
+        try:
+            if params.get('after'):
+                return self._page(params['after'], reverse=False)
+            if params.get('before'):
+                return self._page(params['before'], reverse=True)
+        except (InvalidCursor, TypeError, ValueError):
+            pass
+        return self._page(None, reverse=False)
+
+    def _fallback(self):
+        posts = search_queryset().filter(
+            Q(text__icontains=self.query)
+            | Q(comments__text__icontains=self.query)
+        ).distinct()
+        return CursorPaginator(posts.per_shard(), self.per_page)
+
+    def _page(self, token, reverse):
+        params = [self.match, COMMENT_WEIGHT, self.match]
+        where = ''
+        if token is not None:
+            values = decode_cursor(token)
+            if not all(map(is_cursor_value, values)):
+                raise InvalidCursor(token)
+            rank, post_id = values
+            rank, post_id = float(rank), int(post_id)
+            op = '<' if reverse else '>'
+            where = f'WHERE rank {op} %s OR (rank = %s AND post_id {op} %s)'
+            params += [rank, rank, post_id]
+        direction = 'DESC' if reverse else 'ASC'
+        rows = []
+        for alias in sharding.shards():
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    f'SELECT post_id, rank FROM ({SEARCH_SQL}) {where} '
+                    f'ORDER BY rank {direction}, post_id {direction} '
+                    f'LIMIT %s',
+                    params + [self.per_page + 1],
+                )
+                rows += [(post_id, rank, alias)
+                         for post_id, rank in cursor.fetchall()]
+        rows.sort(key=lambda row: (row[1], row[0]), reverse=reverse)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+        posts = {}
+        for alias in {alias for _, _, alias in rows}:
+            posts.update(search_queryset().using(alias).in_bulk(
+                [post_id for post_id, _, row_alias in rows
+                 if row_alias == alias]))
+        ranked = [(posts[post_id], [rank, post_id])
+                  for post_id, rank, _ in rows if post_id in posts]
+        has_next = has_more if not reverse else True
+        has_previous = token is not None if not reverse else has_more
+        return CursorPage(
+            [post for post, _ in ranked],
+            encode_cursor(ranked[-1][1]) if ranked and has_next else None,
+            encode_cursor(ranked[0][1]) if ranked and has_previous else None,
+            key=token or '',
+        )
@@ -0,0 +1,141 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models import F
+
+ID_SLOTS: int = 1024
+
+POST_SEQUENCE: str = 'post'
+
+
+def is_sharded():
+    return bool(settings.SHARD_DATABASES)
+
+
+def shards():
+    """Базы с постами: шарды или одна основная база."""
+    return settings.SHARD_DATABASES or [DEFAULT_DB_ALIAS]
+
+
+def shard_for_author(author_id):
+    return settings.SHARD_DATABASES[
+        author_id % len(settings.SHARD_DATABASES)]
+
+
+def shard_for_post(post_id):
+    """Шард поста по его id или None, если id не из шардов.
+
+    Остаток от деления id на ID_SLOTS — номер шарда: так post_detail
+    находит пост одним запросом к одной базе.
+    """
+    slot = post_id % ID_SLOTS
+    if slot < len(settings.SHARD_DATABASES):
+        return settings.SHARD_DATABASES[slot]
+    return None
+
+
+def allocate_post_id(author_id):
+    """Новый id поста, общий для всех шардов и растущий со временем."""
+    from .models import Sequence
+
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        sequence, _ = Sequence.objects.get_or_create(name=POST_SEQUENCE)
+        Sequence.objects.filter(pk=sequence.pk).update(last=F('last') + 1)
+        sequence.refresh_from_db()
+    slot = settings.SHARD_DATABASES.index(shard_for_author(author_id))
+    return sequence.last * ID_SLOTS + slot
+
+
+def require_single_database(action):
+    """Команды, читающие посты одним запросом к основной базе."""
+    if is_sharded():
+        raise CommandError(f'{action} не поддерживает шардирование постов')
+
+
+def authors_by_shard(author_ids):
+    groups = defaultdict(list)
+    for author_id in author_ids:
+        groups[shard_for_author(author_id)].append(author_id)
+    return groups
+
+
+class ShardedQuerySet(models.QuerySet):
+    """Запросы к постам и комментариям, знающие о шардах.
+
+    Без шардирования все методы возвращают обычные querysets основной
+    базы, и код view не различает эти режимы.
+    """
+
+    def create(self, **kwargs):
+        """Без явного using база выбирается роутером по самому объекту."""
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
+    def with_related(self, *fields):
+        """select_related, а на шардах prefetch_related.
+
+        Пользователи и группы живут в основной базе, JOIN с ними на
+        шарде ничего не найдёт.
+        """
+        if is_sharded():
+            return self.prefetch_related(*fields)
+        return self.select_related(*fields)
+
+    def per_shard(self):
+        """По queryset на каждый шард для слияния в CursorPaginator."""
+        if not is_sharded():
+            return [self]
+        return [self.using(alias) for alias in shards()]
+
+    def on_author_shard(self, author_id):
+        if not is_sharded():
+            return self
+        return self.using(shard_for_author(author_id))
+
+    def on_post_shard(self, post_id):
+        if not is_sharded():
+            return self
+        alias = shard_for_post(post_id)
+        return self.using(alias) if alias else self.none()
+
+    def exists_on_any_shard(self):
+        return any(queryset.exists() for queryset in self.per_shard())
+
+
+class ShardRouter:
+    """Направляет посты и комментарии на шард автора поста.
+
+    Пост живёт на шарде своего автора, комментарий — на шарде поста.
+    Запросы без подсказки instance идут дальше по цепочке роутеров:
+    такие места должны сами выбирать шард через ShardedQuerySet.
+    """
+
+    def db_for_read(self, model, **hints):
+        return self.route(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self.route(model, hints.get('instance'))
+
+    def route(self, model, instance):
+        from .models import Comment, Post, User
+
+        if not is_sharded() or model not in (Post, Comment):
+            return None
+        if instance is None:
+            return None
+        if instance._state.db in settings.SHARD_DATABASES:
+            return instance._state.db
+        if isinstance(instance, Post):
+            return shard_for_author(instance.author_id)
+        if isinstance(instance, Comment):
+            return shard_for_post(instance.post_id)
+        if isinstance(instance, User) and model is Post:
+            return shard_for_author(instance.pk)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
@@ -0,0 +1,240 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.urls import reverse
+
+from . import (counters, entities, feed, page_cache, sharding, thumbnails,
+               versions)
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def user_names(user):
+    return tuple(user.__dict__.get(name) for name in USER_NAME_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def user_loaded(sender, instance, **kwargs):
+    instance._loaded_username = instance.__dict__.get('username')
+    instance._loaded_names = user_names(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+    else:
+        entities.forget_user(instance, instance._loaded_username)
+        if user_names(instance) != instance._loaded_names:
+            bump_author_versions(instance, instance._loaded_username)
+    instance._loaded_username = instance.username
+    instance._loaded_names = user_names(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    entities.forget_user(instance, instance._loaded_username)
+
+
+def bump_post_versions(post):
+    scopes = versions.post_scopes(post.author_id, post.group_id)
+    scopes.append(f'post:{post.pk}')
+    group_ids = [post.group_id]
+    loaded_group_id = getattr(post, '_loaded_group_id', None)
+    if loaded_group_id not in (None, post.group_id):
+        scopes.append(f'group:{loaded_group_id}')
+        group_ids.append(loaded_group_id)
+    versions.bump(*scopes)
+    feed.bump_followers(post.author_id)
+    page_cache.purge_post_pages(post.pk, post.author_id, group_ids)
+
+
+def bump_card_versions(posts, *paths):
+    """Сбрасывает ленты и страницы, где видны карточки постов.
+
+    Нужна, когда меняется не сам пост, а имя автора или название
+    группы, которые показаны в его карточке и на странице поста.
+    """
+    rows = {row for queryset in posts.per_shard()
+            for row in queryset.values_list('pk', 'author_id', 'group_id')}
+    author_ids = {author_id for _, author_id, _ in rows}
+    group_ids = {group_id for _, _, group_id in rows} - {None}
+    scopes = [f'post:{post_id}' for post_id, _, _ in rows]
+    scopes += [f'author:{author_id}' for author_id in author_ids]
+    scopes += [f'group:{group_id}' for group_id in group_ids]
+    if rows:
+        scopes.append('index')
+        paths += (reverse('posts:index'),)
+    versions.bump(*scopes)
+    for author_id in author_ids:
+        feed.bump_followers(author_id)
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    page_cache.purge(
+        *paths,
+        *(reverse(name, kwargs={'post_id': post_id})
+          for post_id, _, _ in rows
+          for name in ('posts:post_detail', 'posts:post_comments')),
+        *page_cache.profile_paths(*author_ids),
+        *page_cache.group_paths(*slugs),
+    )
+
+
+def bump_author_versions(user, *usernames):
+    """Имя пользователя видно в его постах и комментариях."""
+    versions.bump(f'author:{user.pk}')
+    names = {user.username, *usernames} - {None, ''}
+    bump_card_versions(
+        Post.objects.filter(
+            Q(author=user) | Q(comments__author=user)).distinct(),
+        *(reverse('posts:profile', kwargs={'username': name})
+          for name in names),
+    )
+
+
+def bump_comment_versions(comment):
+    post = Post.objects.on_post_shard(comment.post_id).filter(
+        pk=comment.post_id,
+    ).values_list('author_id', 'group_id').first()
+    if post is not None:
+        author_id, group_id = post
+        versions.bump(
+            *versions.post_scopes(author_id, group_id),
+            f'post:{comment.post_id}',
+        )
+        page_cache.purge_post_pages(comment.post_id, author_id, [group_id])
+
+
+def bump_follow_versions(follow):
+    versions.bump(
+        f'followers:{follow.author_id}', f'following:{follow.user_id}')
+    page_cache.purge(
+        *page_cache.profile_paths(follow.author_id, follow.user_id))
+
+
+def image_name(post):
+    return str(post.__dict__.get('image') or '')
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    """Каскад на шарды: удаление в основной базе их не видит."""
+    if not sharding.is_sharded():
+        return
+    instance.posts.all().delete()
+    for comments in Comment.objects.filter(author=instance).per_shard():
+        comments.delete()
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    if instance.pk is None and sharding.is_sharded():
+        instance.pk = sharding.allocate_post_id(instance.author_id)
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+    instance._loaded_image = image_name(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author_stats(instance.author_id, posts_count=1)
+        feed.fan_out(instance)
+    bump_post_versions(instance)
+    image = image_name(instance)
+    if image != instance._loaded_image:
+        if image:
+            thumbnails.schedule_thumbnails(image)
+        if instance._loaded_image and not created:
+            thumbnails.schedule_release(instance._loaded_image)
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = image
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_author_stats(
+        instance.author_id, create=False, posts_count=-1)
+    bump_post_versions(instance)
+    image = image_name(instance)
+    if image:
+        thumbnails.schedule_release(image)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+    bump_comment_versions(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+    bump_comment_versions(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        with transaction.atomic():
+            counters.change_author_stats(
+                instance.author_id, followers_count=1)
+            counters.change_author_stats(
+                instance.user_id, following_count=1)
+        feed.backfill(instance.user_id, instance.author_id)
+        bump_follow_versions(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    with transaction.atomic():
+        counters.change_author_stats(
+            instance.author_id, create=False, followers_count=-1)
+        counters.change_author_stats(
+            instance.user_id, create=False, following_count=-1)
+        feed.unfollowed(instance.author_id)
+    feed.remove(instance.user_id, instance.author_id)
+    bump_follow_versions(instance)
+
+
+@receiver(post_init, sender=Group)
+def group_loaded(sender, instance, **kwargs):
+    instance._loaded_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        versions.bump('index', f'group:{instance.pk}')
+    slugs = {instance.slug, instance._loaded_slug} - {None, ''}
+    entities.forget_group(*slugs)
+    page_cache.purge(
+        reverse('posts:index'), *page_cache.group_paths(*slugs))
+    if not created:
+        bump_card_versions(Post.objects.filter(group=instance))
+    instance._loaded_slug = instance.slug
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    """SET_NULL для постов на шардах."""
+    if not sharding.is_sharded():
+        return
+    for posts in Post.objects.filter(group=instance).per_shard():
+        posts.update(group=None)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    versions.bump('index', f'group:{instance.pk}')
+    entities.forget_group(instance.slug, instance._loaded_slug)
+    page_cache.purge(
+        reverse('posts:index'), *page_cache.group_paths(instance.slug))
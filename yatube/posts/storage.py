@@ -0,0 +1,85 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_DIR_LEVELS: int = 2
+
+LOCK_NAME: str = '.blobs.lock'
+
+PART_SUFFIX: str = '.part'
+
+
+def content_name(directory, digest, extension):
+    """Путь блоба: posts/ab/cd/<sha256>.<ext>."""
+    shards = [digest[2 * level:2 * level + 2]
+              for level in range(HASH_DIR_LEVELS)]
+    return os.path.join(directory, *shards, digest + extension)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит каждый файл один раз под хешем его содержимого.
+
+    Файл пишется во временный файл рядом с местом назначения и
+    хешируется по ходу записи. Если такой блоб уже есть, копия
+    удаляется, а в поле сохраняется путь к существующему; время
+    изменения блоба обновляется, чтобы release_image не удалил его,
+    пока пост с ним ещё не зафиксирован. Выбор «взять готовый блоб или
+    записать новый» и удаление блоба идут под одним замком locked().
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    @contextmanager
+    def locked(self):
+        """Замок на блобы хранилища, общий для потоков и процессов."""
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, LOCK_NAME), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        target_dir = self.path(directory)
+        os.makedirs(target_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=target_dir, suffix=PART_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            name = content_name(directory, digest.hexdigest(), extension)
+            full_path = self.path(name)
+            with self.locked():
+                if os.path.exists(full_path):
+                    os.remove(temp_path)
+                    os.utime(full_path)
+                else:
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(temp_path, full_path)
+                    os.chmod(full_path, self.file_permissions_mode or 0o644)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name.replace('\\', '/')
+
+
+def blob_names(storage, directory):
+    """Имена всех блобов каталога хранилища, без недописанных файлов."""
+    root = storage.path('')
+    for path, _, files in os.walk(storage.path(directory)):
+        for filename in files:
+            if not filename.endswith(PART_SUFFIX):
+                name = os.path.relpath(os.path.join(path, filename), root)
+                yield name.replace('\\', '/')
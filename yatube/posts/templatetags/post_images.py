@@ -0,0 +1,60 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import get_thumbnail
+
+from ..images import picture_key, variant_presets
+
+register = template.Library()
+
+PICTURE_CACHE_TIMEOUT: int = 60 * 60 * 24
+
+
+def srcset(thumbnails):
+    widths = {}
+    for thumbnail in thumbnails:
+        widths.setdefault(thumbnail.width, thumbnail.url)
+    return ', '.join(f'{url} {width}w' for width, url in widths.items())
+
+
+def resolve_picture(image, geometry):
+    """Адреса вариантов и запасной картинки одного размера.
+
+    Каждый get_thumbnail — обращение к хранилищу ключей sorl, их около
+    десятка на картинку, поэтому результат кэшируется строками.
+    """
+    variants = {image_format: [] for image_format
+                in settings.IMAGE_VARIANT_FORMATS}
+    for variant_geometry, options in variant_presets(geometry):
+        variants[options['format']].append(
+            get_thumbnail(image, variant_geometry, **options))
+    fallback = get_thumbnail(image, geometry, crop='center', upscale=True)
+    return {
+        'fallback': {
+            'url': fallback.url,
+            'width': fallback.width,
+            'height': fallback.height,
+        },
+        'sources': [
+            (f'image/{image_format.lower()}', srcset(thumbnails))
+            for image_format, thumbnails in variants.items()
+        ],
+    }
+
+
+@register.inclusion_tag('includes/picture.html')
+def post_picture(image, geometry, css_class='card-img my-2'):
+    """Картинка поста с вариантами WebP/JPEG разной ширины."""
+    if not image:
+        return {}
+    key = picture_key(image.name)
+    pictures = cache.get(key) or {}
+    if geometry not in pictures:
+        pictures[geometry] = resolve_picture(image, geometry)
+        cache.set(key, pictures, PICTURE_CACHE_TIMEOUT)
+    width = geometry.split('x')[0]
+    return {
+        **pictures[geometry],
+        'sizes': f'(max-width: {width}px) 100vw, {width}px',
+        'css_class': css_class,
+    }
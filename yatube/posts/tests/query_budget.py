@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверки числа SQL-запросов для TestCase."""
+
+    def count_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def assertQueriesDoNotGrow(self, client, url, grow, budget=None):
+        """Падает, если после grow() страница делает больше запросов.
+
+        grow добавляет на страницу строки (посты, комментарии), budget —
+        необязательный верхний предел числа запросов.
+        """
+        before = self.count_queries(client, url)
+        grow()
+        after = self.count_queries(client, url)
+        self.assertEqual(
+            after, before,
+            f'{url}: {before} запросов до роста данных, {after} после',
+        )
+        if budget is not None:
+            self.assertLessEqual(after, budget, url)
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import versions
+from ..models import Comment, Group, Post, User
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(
+            title='test_title',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(
+            text='Старый текст',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        ]
+
+    def test_new_post_is_visible_at_once(self):
+        """Новый пост виден сразу, несмотря на кэш фрагментов."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.author, group=self.group)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
+    def test_edit_and_comment_invalidate_fragment(self):
+        self.guest_client.get(self.urls[0])
+        self.post.text = 'Новый текст'
+        self.post.save()
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий')
+        response = self.guest_client.get(self.urls[0])
+        self.assertContains(response, 'Новый текст')
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_cached_fragment_survives_without_writes(self):
+        self.guest_client.get(self.urls[0])
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        response = self.guest_client.get(self.urls[0])
+        self.assertContains(response, 'Старый текст')
+
+    def test_moving_post_bumps_old_group(self):
+        other = Group.objects.create(title='other', slug='other')
+        old_version = versions.get_version(f'group:{self.group.pk}')
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = other
+        post.save()
+        self.assertGreater(
+            versions.get_version(f'group:{self.group.pk}'), old_version)
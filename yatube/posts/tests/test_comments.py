@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..views import NUMBER_OF_COMMENTS
+
+EXTRA_COMMENTS: int = 5
+
+
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.post = Post.objects.create(text='Вирусный пост', author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Комментарий {i}')
+            for i in range(NUMBER_OF_COMMENTS + EXTRA_COMMENTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.comments_url = reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.pk})
+
+    def test_detail_shows_first_page_only(self):
+        """На странице поста только первая страница комментариев."""
+        comments = self.guest_client.get(self.detail_url).context['comments']
+        self.assertEqual(len(comments), NUMBER_OF_COMMENTS)
+        self.assertEqual(comments[0].text, 'Комментарий 0')
+        self.assertTrue(comments.has_next())
+
+    def test_fragment_continues_after_cursor(self):
+        comments = self.guest_client.get(self.detail_url).context['comments']
+        response = self.guest_client.get(
+            self.comments_url, {'after': comments.next_cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(len(response.context['comments']), EXTRA_COMMENTS)
+        self.assertNotContains(response, '<html')
+        self.assertNotContains(response, 'js-more-comments')
+
+    def test_json_pages_cover_all_comments(self):
+        texts = []
+        params = {'format': 'json'}
+        while True:
+            data = self.guest_client.get(self.comments_url, params).json()
+            texts += [comment['text'] for comment in data['comments']]
+            if data['next'] is None:
+                break
+            params['after'] = data['next']
+        self.assertEqual(
+            texts,
+            [f'Комментарий {i}'
+             for i in range(NUMBER_OF_COMMENTS + EXTRA_COMMENTS)],
+        )
+
+    def test_missing_post_is_404(self):
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 10 ** 6}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_new_comment_purges_fragment(self):
+        params = {'format': 'json', 'after': self.last_page_cursor()}
+        self.guest_client.get(self.comments_url, params)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Свежий комментарий')
+        data = self.guest_client.get(self.comments_url, params).json()
+        self.assertEqual(data['comments'][-1]['text'], 'Свежий комментарий')
+
+    def last_page_cursor(self):
+        return self.guest_client.get(
+            self.detail_url).context['comments'].next_cursor
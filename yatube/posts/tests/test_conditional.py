@@ -0,0 +1,155 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import versions
+from ..conditional import follow_scopes
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test_title',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_answer_304(self):
+        """Повторный запрос с ETag без изменений получает 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(response['ETag'].startswith('W/'))
+                self.assertTrue(response.has_header('Last-Modified'))
+                self.assertEqual(
+                    self.revalidate(self.guest_client, url, response)
+                    .status_code,
+                    HTTPStatus.NOT_MODIFIED,
+                )
+
+    def test_if_modified_since_answers_304(self):
+        url = self.urls[0]
+        response = self.guest_client.get(url)
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_comment_changes_validator(self):
+        responses = {url: self.guest_client.get(url) for url in self.urls}
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.revalidate(self.guest_client, url, response)
+                    .status_code,
+                    HTTPStatus.OK,
+                )
+
+    def test_viewer_gets_own_validator(self):
+        """Гость и пользователь не делят ETag одной страницы."""
+        url = self.urls[0]
+        response = self.guest_client.get(url)
+        self.assertEqual(
+            self.revalidate(self.reader_client, url, response).status_code,
+            HTTPStatus.OK,
+        )
+
+    def test_follow_changes_profile_and_feed(self):
+        urls = [self.urls[2], reverse('posts:follow_index')]
+        responses = {url: self.reader_client.get(url) for url in urls}
+        Follow.objects.create(user=self.reader, author=self.author)
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.revalidate(self.reader_client, url, response)
+                    .status_code,
+                    HTTPStatus.OK,
+                )
+
+    def test_new_post_of_followed_author_changes_feed(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        url = reverse('posts:follow_index')
+        response = self.reader_client.get(url)
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(
+            self.revalidate(self.reader_client, url, response).status_code,
+            HTTPStatus.OK,
+        )
+
+    def test_feed_validator_does_not_grow_with_follows(self):
+        """Ленте подписок хватает одного поколения на пользователя."""
+        for number in range(3):
+            author = User.objects.create_user(username=f'author{number}')
+            Follow.objects.create(user=self.reader, author=author)
+        request = RequestFactory().get('/')
+        request.user = self.reader
+        self.assertEqual(follow_scopes(request),
+                         [f'following:{self.reader.pk}',
+                          f'feed:{self.reader.pk}'])
+
+    def test_edit_of_followed_post_changes_feed(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        url = reverse('posts:follow_index')
+        response = self.reader_client.get(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertEqual(
+            self.revalidate(self.reader_client, url, response).status_code,
+            HTTPStatus.OK,
+        )
+
+    @override_settings(FEED_PULL_THRESHOLD=1)
+    def test_pull_author_keeps_own_scope(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        request = RequestFactory().get('/')
+        request.user = self.reader
+        self.assertIn(f'author:{self.author.pk}', follow_scopes(request))
+
+    def test_group_change_changes_post_validator(self):
+        """Название группы на странице поста тоже входит в ETag."""
+        url = self.urls[3]
+        response = self.reader_client.get(url)
+        versions.bump(f'group:{self.group.pk}')
+        self.assertEqual(
+            self.revalidate(self.reader_client, url, response).status_code,
+            HTTPStatus.OK,
+        )
+
+    def test_missing_objects_still_404(self):
+        for url in (
+            reverse('posts:group_posts', kwargs={'slug': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code,
+                    HTTPStatus.NOT_FOUND,
+                )
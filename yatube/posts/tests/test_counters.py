@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Post, User
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_posts_are_counted(self):
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        post = Post.objects.create(text='Ещё пост', author=self.author)
+        self.assertEqual(self.stats(self.author).posts_count, 2)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+
+    def test_comments_are_counted(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_follows_are_counted(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_recount_repairs_drift(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.filter(user=self.reader).delete()
+        AuthorStats.objects.filter(user=self.author).update(
+            posts_count=10, followers_count=0)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=5)
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('авторов 2, постов 1', out.getvalue())
+        author_stats = self.stats(self.author)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_profile_shows_stored_counter(self):
+        AuthorStats.objects.filter(user=self.author).update(posts_count=42)
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': self.author}))
+        self.assertContains(response, 'Всего постов: 42')
@@ -0,0 +1,116 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from users.backends import CachedModelBackend
+
+from .. import entities
+from ..models import Group, User
+
+
+class EntityCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookups_are_cached(self):
+        """Повторные обращения не ходят в базу."""
+        entities.get_user_by_username('author')
+        entities.get_group('group')
+        with self.assertNumQueries(0):
+            self.assertEqual(entities.get_user_by_username('author'),
+                             self.user)
+            self.assertEqual(entities.get_user(self.user.pk), self.user)
+            self.assertEqual(entities.get_group('group'), self.group)
+
+    def test_rename_forgets_old_username(self):
+        user = User.objects.create_user(username='old')
+        entities.get_user_by_username('old')
+        user.username = 'new'
+        user.save()
+        self.assertIsNone(entities.get_user_by_username('old'))
+        self.assertEqual(entities.get_user(user.pk).username, 'new')
+
+    def test_group_changes_are_visible(self):
+        group = Group.objects.create(
+            title='Старая', slug='old', description='Описание')
+        entities.get_group('old')
+        group.title = 'Новая'
+        group.save()
+        self.assertEqual(entities.get_group('old').title, 'Новая')
+        group.delete()
+        self.assertIsNone(entities.get_group('old'))
+
+    def test_missing_entities(self):
+        self.assertIsNone(entities.get_user_by_username('nobody'))
+        self.assertIsNone(entities.get_group('missing'))
+
+    def test_backend_reads_user_from_cache(self):
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+
+    def test_backend_rejects_inactive_user(self):
+        user = User.objects.create_user(username='inactive')
+        CachedModelBackend().get_user(user.pk)
+        user.is_active = False
+        user.save()
+        self.assertIsNone(CachedModelBackend().get_user(user.pk))
+
+    def test_password_hash_is_not_cached(self):
+        user = User.objects.create_user(username='secret', password='пароль')
+        entities.get_user(user.pk)
+        fields = cache.get(entities.user_key(user.pk))
+        self.assertNotIn('password', fields)
+        self.assertNotIn(user.password, fields.values())
+
+    def test_cached_user_keeps_password_on_save(self):
+        """Пароль отложен и подгружается, save() его не затирает."""
+        user = User.objects.create_user(username='saver', password='пароль')
+        entities.get_user(user.pk)
+        cached = entities.get_user(user.pk)
+        cached.first_name = 'Имя'
+        cached.save()
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('пароль'))
+        self.assertEqual(user.first_name, 'Имя')
+
+    def test_session_survives_cache_and_password_change(self):
+        user = User.objects.create_user(username='session', password='старый')
+        client = Client()
+        client.force_login(user)
+        url = reverse('posts:follow_index')
+        self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(client.get(url).status_code, 200)
+        user.set_password('новый')
+        user.save()
+        self.assertEqual(client.get(url).status_code, 302)
+
+    def test_password_change_keeps_session(self):
+        """После смены пароля в сессии хеш нового пароля."""
+        user = User.objects.create_user(username='changer', password='старый')
+        client = Client()
+        client.force_login(user)
+        url = reverse('posts:follow_index')
+        client.get(url)
+        response = client.post(reverse('users:password_change_form'), {
+            'old_password': 'старый',
+            'new_password1': 'Новый-пароль-42',
+            'new_password2': 'Новый-пароль-42',
+        })
+        self.assertRedirects(response, reverse('users:password_change_done'))
+        self.assertEqual(client.get(url).status_code, 200)
+
+    def test_old_backend_sessions_are_kept(self):
+        client = Client()
+        client.force_login(
+            self.user, 'django.contrib.auth.backends.ModelBackend')
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,83 @@
+import csv
+import json
+import os
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='test_title',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост', author=cls.author, group=cls.group)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def export(self, *args, **options):
+        out = StringIO()
+        call_command('export_yatube', *args, stdout=out, stderr=StringIO(),
+                     **options)
+        return out.getvalue()
+
+    def test_ndjson_has_every_table(self):
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(
+            [record['model'] for record in records],
+            ['posts.group', 'posts.post', 'posts.comment', 'posts.follow'],
+        )
+        self.assertEqual(records[1]['fields']['text'], 'Первый пост')
+
+    def test_csv_of_one_table(self):
+        rows = list(csv.reader(StringIO(
+            self.export('comments', format='csv'))))
+        self.assertEqual(rows[0][0], 'id')
+        self.assertEqual(rows[1][3], 'Комментарий')
+
+    def test_state_file_exports_only_new_rows(self):
+        """Повторная выгрузка с отметкой отдаёт только новые строки."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        state = os.path.join(directory.name, 'state.json')
+        self.export('posts', state=state)
+        self.assertEqual(self.export('posts', state=state), '')
+        Post.objects.create(text='Второй пост', author=self.author)
+        records = [json.loads(line)
+                   for line in self.export('posts', state=state).splitlines()]
+        self.assertEqual(
+            [record['fields']['text'] for record in records], ['Второй пост'])
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('posts:export', kwargs={'table': 'posts'})
+        client = Client()
+        client.force_login(self.reader)
+        self.assertEqual(client.get(url).status_code, HTTPStatus.FOUND)
+
+    def test_endpoint_streams_since_high_water_mark(self):
+        second = Post.objects.create(text='Второй пост', author=self.author)
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(
+            reverse('posts:export', kwargs={'table': 'posts'}),
+            {'since': self.post.pk},
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['pk'] for line in lines],
+                         [second.pk])
@@ -0,0 +1,73 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import FeedEntry, Follow, Post, User
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def feed_page(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_feed(self):
+        """Подписка переносит в ленту уже опубликованные посты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=self.old_post).exists())
+        self.assertEqual(self.feed_page(), [self.old_post])
+
+    def test_new_post_fans_out(self):
+        """Новый пост сразу попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.feed_page(), [post, self.old_post])
+
+    def test_unfollow_cleans_feed(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_page(), [])
+
+    @override_settings(FEED_MAX_ENTRIES=2)
+    def test_feed_is_capped(self):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author) for i in range(3))
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader).count(), 2)
+
+    @override_settings(FEED_PULL_THRESHOLD=1)
+    def test_popular_author_is_pulled(self):
+        """Посты популярного автора читаются без раскладки по лентам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_page(), [post, self.old_post])
+
+    @override_settings(FEED_PULL_THRESHOLD=2)
+    def test_author_back_below_threshold_keeps_posts(self):
+        """Посты pull-периода остаются в ленте после перехода порога."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Пост pull-периода',
+                                   author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        Follow.objects.filter(user=other).delete()
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed_page(), [post, self.old_post])
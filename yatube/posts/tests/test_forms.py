@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -8,6 +9,7 @@ from django.test import Client, TestCase
 from django.urls import reverse
 
 from ..models import Comment, Group, Post, User
+from ..storage import content_name
 
 
 class PostCreateFormTests(TestCase):
@@ -76,11 +78,10 @@ class PostCreateFormTests(TestCase):
             'posts:profile', kwargs={'username': f'{self.user}'})
         )
         self.assertEqual(Post.objects.count(), posts_count + 1)
-        self.assertTrue(Post.objects.filter(
-            text='Тестовый пост',
-            group=self.group.pk,
-            image='posts/small.gif').exists()
-        )
+        post = Post.objects.get(text='Тестовый пост', group=self.group.pk)
+        digest = hashlib.sha256(post.image.read()).hexdigest()
+        self.assertEqual(
+            post.image.name, content_name('posts', digest, '.gif'))
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_edit_post(self):
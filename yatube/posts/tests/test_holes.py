@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Post, User
+
+
+class HolePunchedPageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.post_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.profile_url = reverse(
+            'posts:profile', kwargs={'username': self.author})
+
+    def test_body_is_rendered_once_for_all_users(self):
+        """Второй пользователь получает общую страницу со своей шапкой."""
+        url = reverse('posts:index')
+        self.author_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, 'posts/index.html')
+        self.assertTemplateUsed(response, 'includes/header.html')
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'Тестовый пост')
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_switcher_follows_viewer_in_any_order(self):
+        """Вкладки лент видны только с входом, кто бы ни открыл первым."""
+        url = reverse('posts:index')
+        follow_url = reverse('posts:follow_index')
+        for guest_first in (True, False):
+            with self.subTest(guest_first=guest_first):
+                cache.clear()
+                if guest_first:
+                    guest = Client().get(url)
+                    reader = self.reader_client.get(url)
+                else:
+                    reader = self.reader_client.get(url)
+                    guest = Client().get(url)
+                self.assertContains(reader, follow_url)
+                self.assertNotContains(guest, follow_url)
+
+    def test_edit_link_only_for_author(self):
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.pk})
+        self.assertContains(self.author_client.get(self.post_url), edit_url)
+        response = self.reader_client.get(self.post_url)
+        self.assertTemplateNotUsed(response, 'posts/post_detail.html')
+        self.assertNotContains(response, edit_url)
+
+    def test_comment_form_has_fresh_csrf_token(self):
+        self.author_client.get(self.post_url)
+        response = self.reader_client.get(self.post_url)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(Client().get(self.post_url), 'csrfmiddleware')
+
+    def test_follow_button_follows_viewer(self):
+        self.author_client.get(self.profile_url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.reader_client.get(self.profile_url),
+                            'Отписаться')
+        self.assertContains(self.author_client.get(self.profile_url),
+                            'Подписаться')
@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..forms import PostForm
+from ..images import normalize_upload, variant_presets
+from ..models import Post, User
+
+
+def jpeg_upload(size, orientation=None):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    content = BytesIO()
+    image.save(content, 'JPEG', exif=exif)
+    return SimpleUploadedFile('photo.jpg', content.getvalue(), 'image/jpeg')
+
+
+@override_settings(IMAGE_MAX_SIDE=100)
+class NormalizeUploadTest(TestCase):
+    def test_large_image_is_shrunk(self):
+        upload = normalize_upload(jpeg_upload((400, 200)))
+        self.assertEqual(Image.open(upload).size, (100, 50))
+
+    def test_exif_rotation_is_applied_and_stripped(self):
+        """Поворот из EXIF применяется к пикселям, метаданные удаляются."""
+        upload = normalize_upload(jpeg_upload((40, 20), orientation=6))
+        image = Image.open(upload)
+        self.assertEqual(image.size, (20, 40))
+        self.assertNotIn(0x0112, image.getexif())
+
+    def test_form_normalizes_upload(self):
+        form = PostForm(
+            data={'text': 'Пост с фото'},
+            files={'image': jpeg_upload((300, 300))},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.size, (100, 100))
+
+
+@override_settings(
+    IMAGE_VARIANT_WIDTHS=[300, 600],
+    IMAGE_VARIANT_FORMATS=['WEBP', 'JPEG'],
+)
+class PictureTagTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_variant_presets_keep_proportions(self):
+        self.assertEqual(
+            [geometry for geometry, _ in variant_presets('604x250')],
+            ['300x124', '300x124', '600x248', '600x248'],
+        )
+
+    def test_picture_has_source_per_format(self):
+        """Тег отдаёт <source> с srcset на каждый формат и запасной <img>."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с фото',
+            image=jpeg_upload((1200, 800)),
+        )
+        html = Template(
+            '{% load post_images %}{% post_picture post.image "604x250" %}'
+        ).render(Context({'post': post}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('type="image/jpeg"', html)
+        self.assertIn(' 300w', html)
+        self.assertIn(' 600w', html)
+        self.assertIn('width="604"', html)
+
+    def test_picture_is_resolved_once(self):
+        """Повторная отрисовка не обращается к миниатюрам sorl."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с фото',
+            image=jpeg_upload((1200, 800)),
+        )
+        template = Template(
+            '{% load post_images %}{% post_picture post.image "604x250" %}')
+        html = template.render(Context({'post': post}))
+        patch = mock.patch('posts.templatetags.post_images.get_thumbnail')
+        with patch as get_thumbnail:
+            self.assertEqual(template.render(Context({'post': post})), html)
+        get_thumbnail.assert_not_called()
+
+    def test_picture_without_image_is_empty(self):
+        post = Post(author=self.user, text='Без картинки')
+        html = Template(
+            '{% load post_images %}{% post_picture post.image "604x250" %}'
+        ).render(Context({'post': post}))
+        self.assertNotIn('<picture>', html)
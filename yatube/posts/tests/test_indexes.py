@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.slow_queries import full_scans
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTest(TestCase):
+    """Главный запрос каждой ленты идёт по индексу, без сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def main_query(self, url, table):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        for query in queries:
+            if f'FROM "{table}"' in query['sql'] and 'ORDER BY' in query[
+                    'sql']:
+                return query['sql']
+        self.fail(f'{url}: нет упорядоченного запроса к {table}')
+
+    def assertUsesIndex(self, url, table):
+        plan = query_plan(self.main_query(url, table))
+        self.assertFalse(full_scans(plan), plan)
+        self.assertFalse(
+            [line for line in plan if 'TEMP B-TREE' in line], plan)
+        self.assertTrue([line for line in plan if 'INDEX' in line], plan)
+
+    def test_index(self):
+        self.assertUsesIndex(reverse('posts:index'), 'posts_post')
+
+    def test_group_posts(self):
+        self.assertUsesIndex(
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            'posts_post',
+        )
+
+    def test_profile(self):
+        self.assertUsesIndex(
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            'posts_post',
+        )
+
+    def test_follow_index(self):
+        """Лента подписок читается по индексу FeedEntry в порядке страницы."""
+        self.assertUsesIndex(reverse('posts:follow_index'), 'posts_post')
+
+    def test_post_comments(self):
+        for name in ('posts:post_detail', 'posts:post_comments'):
+            with self.subTest(name=name):
+                self.assertUsesIndex(
+                    reverse(name, kwargs={'post_id': self.post.pk}),
+                    'posts_comment',
+                )
+
+
+class UniqueFollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def test_duplicate_follow_rejected(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_follow_twice_keeps_one_row(self):
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:profile_follow',
+                      kwargs={'username': self.author.username})
+        client.get(url)
+        client.get(url)
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader).count(), 1)
@@ -0,0 +1,84 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..counters import recount_authors, recount_comments
+from ..models import Comment, FeedEntry, Follow, Group, Post, User
+
+
+def index_names():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('index', 'trigger')"
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+class LoadYatubeTest(TestCase):
+    def load(self, **options):
+        out = StringIO()
+        call_command('load_yatube', stdout=out, **options)
+        return out.getvalue()
+
+    def test_generates_requested_volume(self):
+        indexes = index_names()
+        out = self.load(users=30, groups=3, posts=200, comments=300,
+                        follows_per_user=3, batch_size=50)
+        self.assertIn('строк/с', out)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(index_names(), indexes)
+
+    def test_counters_and_feeds_are_consistent(self):
+        """После загрузки счётчики и ленты совпадают с данными."""
+        self.load(users=20, groups=2, posts=100, comments=100,
+                  follows_per_user=2)
+        self.assertEqual(recount_authors(), 0)
+        self.assertEqual(recount_comments(), 0)
+        follow = Follow.objects.first()
+        self.assertEqual(
+            FeedEntry.objects.filter(user_id=follow.user_id).count(),
+            Post.objects.filter(
+                author__following__user_id=follow.user_id).distinct().count(),
+        )
+
+    def test_keeps_given_dates(self):
+        self.load(users=5, groups=0, posts=50, comments=0,
+                  follows_per_user=0, days=30)
+        dates = Post.objects.values_list('pub_date', flat=True)
+        self.assertGreater(len(set(dates)), 1)
+        post = Post.objects.create(text='Новый', author=User.objects.first())
+        self.assertEqual(post.pub_date, Post.objects.first().pub_date)
+
+    def test_loads_export_file(self):
+        self.load(users=10, groups=2, posts=30, comments=30,
+                  follows_per_user=2)
+        dump = StringIO()
+        call_command('export_yatube', stdout=dump, stderr=StringIO())
+        texts = list(Post.objects.order_by('pk').values_list(
+            'text', flat=True))
+        Follow.objects.all().delete()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        call_command('load_yatube', input=self.write(dump.getvalue()),
+                     stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            texts,
+        )
+        self.assertEqual(recount_authors(), 0)
+
+    def write(self, content):
+        dump = tempfile.NamedTemporaryFile(
+            'w', suffix='.ndjson', encoding='utf-8', delete=False)
+        self.addCleanup(os.remove, dump.name)
+        with dump:
+            dump.write(content)
+        return dump.name
@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test_title',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_repeat_visit_runs_no_queries(self):
+        """Повторный запрос гостя отдаётся из кэша без обращений к БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertContains(response, 'Тестовый пост')
+
+    def test_query_string_is_part_of_key(self):
+        url = self.urls[0]
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+        response = self.guest_client.get(url, {'page': 2})
+        self.assertIsNotNone(response.context)
+
+    def test_cached_page_answers_304(self):
+        url = self.urls[0]
+        response = self.guest_client.get(url)
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_logged_in_user_is_not_served_from_cache(self):
+        client = Client()
+        client.force_login(self.reader)
+        self.guest_client.get(self.urls[0])
+        self.assertContains(client.get(self.urls[0]), 'Пользователь: reader')
+
+    def test_comment_purges_pages(self):
+        for url in self.urls:
+            self.guest_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Свежий комментарий')
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.guest_client.get(url), 'Комментариев: 1')
+        self.assertContains(
+            self.guest_client.get(self.urls[3]), 'Свежий комментарий')
+
+    def test_new_post_purges_pages(self):
+        for url in self.urls[:3]:
+            self.guest_client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.author, group=self.group)
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
+    def test_follow_purges_profile(self):
+        url = self.urls[2]
+        self.guest_client.get(url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.guest_client.get(url), 'Подписчиков: 1')
+
+    def test_group_change_purges_group_page(self):
+        url = self.urls[1]
+        self.guest_client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertContains(self.guest_client.get(url), 'Новое название')
+        group.delete()
+        self.assertEqual(
+            self.guest_client.get(url).status_code, HTTPStatus.NOT_FOUND)
+
+    def test_author_rename_purges_pages(self):
+        """Новое имя автора видно во всех карточках его постов."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Новое'
+        author.last_name = 'Имя'
+        author.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Новое Имя')
+
+    def test_commenter_rename_purges_post_page(self):
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        url = self.urls[3]
+        self.guest_client.get(url)
+        reader = User.objects.get(pk=self.reader.pk)
+        reader.username = 'renamed'
+        reader.save()
+        self.assertContains(self.guest_client.get(url), 'renamed')
+
+    def test_group_rename_purges_post_page(self):
+        url = self.urls[3]
+        self.guest_client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertContains(self.guest_client.get(url), 'Новое название')
@@ -0,0 +1,68 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from .query_budget import QueryBudgetMixin
+
+POSTS_PER_GROWTH: int = 5
+
+
+class QueryCountTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(
+            username='writer',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        cls.group = Group.objects.create(
+            title='test_title',
+            slug='test_slug',
+            description='test_description',
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def add_posts(self):
+        for i in range(POSTS_PER_GROWTH):
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=self.author,
+                group=self.group,
+            )
+
+    def add_comments(self):
+        for i in range(POSTS_PER_GROWTH):
+            Comment.objects.create(
+                post=self.post,
+                author=User.objects.create_user(username=f'commenter{i}'),
+                text=f'Комментарий {i}',
+            )
+
+    def test_feeds_do_not_grow_with_page_size(self):
+        """Число запросов ленты не зависит от числа постов на странице."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertQueriesDoNotGrow(
+                    self.authorized_client, url, self.add_posts)
+
+    def test_post_detail_does_not_grow_with_comments(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertQueriesDoNotGrow(
+            self.authorized_client, url, self.add_comments)
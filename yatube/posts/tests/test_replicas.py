@@ -0,0 +1,71 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.replicas import mark_synced, pin_to_primary
+
+from .. import versions
+from ..models import Post, User
+from ..replicas import can_use_replica
+from ..views import post_comments
+
+
+@override_settings(REPLICA_DATABASES=['replica'], REPLICA_STICKY_SECONDS=5)
+class CanUseReplicaTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/')
+        self.request.user = AnonymousUser()
+
+    def test_plain_read_uses_fresh_replica(self):
+        """View без лент читает с реплики только после свежей синхронизации."""
+        self.assertFalse(can_use_replica(self.request))
+        mark_synced(time.time() - 60)
+        self.assertFalse(can_use_replica(self.request))
+        mark_synced(time.time())
+        self.assertTrue(can_use_replica(self.request))
+
+    def test_post_request_uses_primary(self):
+        request = RequestFactory().post('/')
+        request.user = self.user
+        self.assertFalse(can_use_replica(request))
+
+    def test_pinned_user_uses_primary(self):
+        pin_to_primary(self.user.pk)
+        self.request.user = self.user
+        self.assertFalse(can_use_replica(self.request))
+
+    def test_feed_changed_after_sync_uses_primary(self):
+        """Ленту, изменённую после синхронизации, реплика ещё не получила."""
+        self.request._feed_scopes = ['index']
+        versions.bump('index')
+        mark_synced(time.time() - 60)
+        self.assertFalse(can_use_replica(self.request))
+        mark_synced(time.time() + 1)
+        self.assertTrue(can_use_replica(self.request))
+
+    def test_feed_without_sync_uses_primary(self):
+        self.request._feed_scopes = ['index']
+        versions.bump('index')
+        self.assertFalse(can_use_replica(self.request))
+
+    def test_comment_pages_declare_scopes(self):
+        """Страницы комментариев тоже проверяют отставание реплики."""
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(text='Пост', author=author)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        seen = []
+        with mock.patch('posts.replicas.can_use_replica',
+                        side_effect=lambda request: seen.append(
+                            request._feed_scopes)):
+            post_comments(request, post_id=post.pk)
+        self.assertEqual(seen, [[f'post:{post.pk}', f'author:{author.pk}']])
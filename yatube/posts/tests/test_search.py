@@ -0,0 +1,75 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..paginator import encode_cursor
+from ..search import PostSearch, build_match
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+        cls.cats = Post.objects.create(
+            text='Кошки спят весь день', author=cls.user)
+        cls.dogs = Post.objects.create(
+            text='Собаки гуляют утром', author=cls.user)
+        Comment.objects.create(
+            post=cls.dogs, author=cls.user, text='А кошки гуляют сами')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query, per_page=10, params=None):
+        return list(PostSearch(query, per_page).get_page(params or {}))
+
+    def test_build_match_quotes_words(self):
+        self.assertEqual(build_match('кот" OR *'), '"кот" "OR"')
+        self.assertEqual(build_match('прив* мир'), '"прив"* "мир"')
+
+    def test_post_text_ranks_above_comment(self):
+        """Совпадение в тексте поста важнее совпадения в комментарии."""
+        self.assertEqual(self.found('кошки'), [self.cats, self.dogs])
+
+    def test_prefix_query(self):
+        self.assertEqual(self.found('соб*'), [self.dogs])
+
+    def test_index_follows_edits_and_deletes(self):
+        cats = Post.objects.get(pk=self.cats.pk)
+        cats.text = 'Хомяки'
+        cats.save()
+        self.assertEqual(self.found('хомяки'), [cats])
+        self.assertEqual(self.found('спят'), [])
+        Post.objects.filter(pk=self.dogs.pk).delete()
+        self.assertEqual(self.found('собаки'), [])
+
+    def test_results_are_paginated_by_cursor(self):
+        first = PostSearch('кошки', 1).get_page({})
+        self.assertEqual(list(first), [self.cats])
+        second = PostSearch('кошки', 1).get_page({'after': first.next_cursor})
+        self.assertEqual(list(second), [self.dogs])
+        self.assertFalse(second.has_next())
+        back = PostSearch('кошки', 1).get_page(
+            {'before': second.previous_cursor})
+        self.assertEqual(list(back), [self.cats])
+
+    def test_cursor_out_of_range_shows_first_page(self):
+        token = encode_cursor([float('inf'), 10 ** 30])
+        page = PostSearch('кошки', 1).get_page({'after': token})
+        self.assertEqual(list(page), [self.cats])
+
+    def test_search_page(self):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'утром'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(list(response.context['page_obj']), [self.dogs])
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@mail.ru', password='pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get('/admin/posts/post/', {'q': 'спят'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.cats])
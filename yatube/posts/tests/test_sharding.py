@@ -0,0 +1,145 @@
+import json
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..sharding import ID_SLOTS, shard_for_post
+
+SHARDS = ['shard0', 'shard1']
+
+
+@override_settings(SHARD_DATABASES=SHARDS)
+class ShardingTest(TestCase):
+    databases = {'default', *SHARDS}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.first = User.objects.create_user(username='first')
+        cls.second = User.objects.create_user(username='second')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def shard_of(self, author):
+        return SHARDS[author.pk % len(SHARDS)]
+
+    def page(self, url):
+        return list(self.client.get(url).context['page_obj'])
+
+    def test_post_lands_on_author_shard(self):
+        """Пост хранится на шарде автора, а его id указывает на шард."""
+        author_client = Client()
+        author_client.force_login(self.first)
+        author_client.post(
+            reverse('posts:post_create'), {'text': 'Пост через форму'})
+        shard = self.shard_of(self.first)
+        post = Post.objects.using(shard).get(text='Пост через форму')
+        self.assertEqual(shard_for_post(post.pk), shard)
+        self.assertFalse(Post.objects.using('default').exists())
+
+    def test_ids_grow_across_shards(self):
+        first = Post.objects.create(text='Первый', author=self.first)
+        second = Post.objects.create(text='Второй', author=self.second)
+        self.assertNotEqual(first._state.db, second._state.db)
+        self.assertGreater(second.pk // ID_SLOTS, first.pk // ID_SLOTS)
+
+    def test_index_merges_shards(self):
+        """Главная и группа сливают шарды в порядке публикации."""
+        posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=author, group=self.group)
+            for number, author in enumerate(
+                [self.first, self.second, self.first, self.second])
+        ]
+        expected = posts[::-1]
+        self.assertEqual(self.page(reverse('posts:index')), expected)
+        self.assertEqual(
+            self.page(reverse('posts:group_posts', args=['group'])), expected)
+
+    def test_follow_index_reads_followed_shards(self):
+        Post.objects.create(text='Чужой пост', author=self.reader)
+        followed = [
+            Post.objects.create(text='Пост первого', author=self.first),
+            Post.objects.create(text='Пост второго', author=self.second),
+        ]
+        Follow.objects.create(user=self.reader, author=self.first)
+        Follow.objects.create(user=self.reader, author=self.second)
+        self.assertEqual(
+            self.page(reverse('posts:follow_index')), followed[::-1])
+
+    def test_comments_live_with_post(self):
+        post = Post.objects.create(text='Пост', author=self.first)
+        self.client.post(
+            reverse('posts:add_comment', args=[post.pk]),
+            {'text': 'Комментарий'},
+        )
+        comment = Comment.objects.using(post._state.db).get()
+        self.assertEqual(comment.author, self.reader)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertEqual(response.context['post'], post)
+        self.assertEqual(list(response.context['comments']), [comment])
+
+    def test_unknown_slot_is_not_found(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[ID_SLOTS - 1]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_delete_removes_sharded_posts(self):
+        """Без внешних ключей каскад по шардам делают сигналы."""
+        post = Post.objects.create(text='Пост', author=self.first)
+        Comment.objects.create(post=post, author=self.second, text='Ответ')
+        self.second.delete()
+        self.assertFalse(Comment.objects.using(post._state.db).exists())
+        self.first.delete()
+        self.assertFalse(Post.objects.using(post._state.db).exists())
+
+    def test_group_delete_detaches_posts(self):
+        group = Group.objects.create(
+            title='Временная', slug='temporary', description='Описание')
+        post = Post.objects.create(
+            text='Пост', author=self.first, group=group)
+        group.delete()
+        post.refresh_from_db()
+        self.assertIsNone(post.group_id)
+
+    def test_search_reads_every_shard(self):
+        """Поиск сливает совпадения со всех шардов."""
+        found = [
+            Post.objects.create(text='Пост про котов', author=self.first),
+            Post.objects.create(text='Ещё про котов', author=self.second),
+        ]
+        Post.objects.create(text='Пост про собак', author=self.second)
+        result = self.page(reverse('posts:search') + '?q=котов')
+        self.assertCountEqual(result, found)
+
+    def test_export_reads_every_shard(self):
+        """Выгрузка сливает посты всех шардов по возрастанию id."""
+        posts = [
+            Post.objects.create(text='Первый', author=self.first),
+            Post.objects.create(text='Второй', author=self.second),
+        ]
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(
+            reverse('posts:export', kwargs={'table': 'posts'}))
+        records = [json.loads(line) for line in b''.join(
+            response.streaming_content).decode().splitlines()]
+        self.assertEqual([record['pk'] for record in records],
+                         [post.pk for post in posts])
+
+    def test_single_database_commands_refuse(self):
+        for command in ('recount', 'dedupe_images', 'warm_thumbnails'):
+            with self.subTest(command=command):
+                with self.assertRaises(CommandError):
+                    call_command(command)
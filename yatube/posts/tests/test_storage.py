@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Post, User
+from ..storage import ContentAddressedStorage
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def run_on_commit():
+    return mock.patch(
+        'posts.thumbnails.transaction.on_commit',
+        side_effect=lambda callback: callback(),
+    )
+
+
+@override_settings(THUMBNAIL_WORKERS=0, IMAGE_RELEASE_GRACE=0)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.user = User.objects.create_user(username='memer')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+    def create_post(self, filename='meme.gif'):
+        return Post.objects.create(
+            author=self.user,
+            text='Мем',
+            image=SimpleUploadedFile(filename, SMALL_GIF, 'image/gif'),
+        )
+
+    def blobs(self):
+        found = []
+        for root, _, files in os.walk(os.path.join(self.media_root, 'posts')):
+            found.extend(os.path.join(root, name) for name in files)
+        return found
+
+    def test_name_is_sharded_content_hash(self):
+        storage = ContentAddressedStorage(location=self.media_root)
+        name = storage.save('posts/Photo.GIF', ContentFile(b'content'))
+        digest = (
+            'ed7002b439e9ac845f22357d822bac14'
+            '44730fbdb6016d3ec9432297b9ec9f73'
+        )
+        self.assertEqual(name, f'posts/ed/70/{digest}.gif')
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковые картинки под разными именами хранятся одним файлом."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(len(self.blobs()), 1)
+
+    def test_blob_is_kept_while_referenced(self):
+        first = self.create_post()
+        second = self.create_post()
+        with run_on_commit():
+            first.delete()
+        self.assertTrue(second.image.storage.exists(second.image.name))
+        with run_on_commit():
+            second.delete()
+        self.assertEqual(self.blobs(), [])
+
+    @override_settings(IMAGE_RELEASE_GRACE=60)
+    def test_recently_reused_blob_is_kept(self):
+        """Блоб, только что доставшийся другому посту, не удаляется."""
+        post = self.create_post()
+        with run_on_commit():
+            post.delete()
+        self.assertEqual(len(self.blobs()), 1)
+
+    def test_release_images_sweeps_unreferenced_blobs(self):
+        """Отложенные блобы удаляет команда, а не таймер процесса."""
+        kept = self.create_post('kept.gif')
+        post = Post.objects.create(
+            author=self.user, text='Другой мем',
+            image=SimpleUploadedFile('other.gif', SMALL_GIF + b'\x00',
+                                     'image/gif'),
+        )
+        with self.settings(IMAGE_RELEASE_GRACE=60):
+            with run_on_commit():
+                post.delete()
+        self.assertEqual(len(self.blobs()), 2)
+        out = StringIO()
+        call_command('release_images', stdout=out)
+        self.assertIn('Удалено картинок: 1', out.getvalue())
+        self.assertEqual(self.blobs(), [kept.image.path])
+
+    def test_replaced_image_is_released(self):
+        post = self.create_post()
+        post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF + b'\x00', 'image/gif')
+        with run_on_commit():
+            post.save()
+        self.assertEqual(self.blobs(), [post.image.path])
+
+    def test_dedupe_images_command(self):
+        storage = Post._meta.get_field('image').storage
+        os.makedirs(os.path.join(self.media_root, 'posts'))
+        for name in ('posts/old1.gif', 'posts/old2.gif'):
+            with open(os.path.join(self.media_root, name), 'wb') as f:
+                f.write(SMALL_GIF)
+            Post.objects.create(author=self.user, text='Старый', image=name)
+        out = StringIO()
+        call_command('dedupe_images', stdout=out)
+        self.assertIn('Перенесено картинок: 2', out.getvalue())
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(storage.exists(names.pop()))
+        self.assertEqual(len(self.blobs()), 1)
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Post, User
+from ..images import all_presets
+from ..thumbnails import build_thumbnails
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.user = User.objects.create_user(username='writer')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def thumbnails(self):
+        found = []
+        for _, _, files in os.walk(os.path.join(self.media_root, 'cache')):
+            found.extend(files)
+        return found
+
+    def test_build_thumbnails_makes_every_preset(self):
+        post = self.create_post()
+        build_thumbnails(post.image.name)
+        self.assertEqual(
+            len(self.thumbnails()), len(all_presets()))
+
+    def test_saving_post_schedules_thumbnails(self):
+        """Миниатюры строятся после сохранения поста, а не при показе."""
+        with mock.patch(
+            'posts.thumbnails.transaction.on_commit',
+            side_effect=lambda callback: callback(),
+        ) as on_commit:
+            self.create_post()
+        on_commit.assert_called_once()
+        self.assertEqual(
+            len(self.thumbnails()), len(all_presets()))
+
+    def test_warm_thumbnails_command(self):
+        self.create_post()
+        out = StringIO()
+        call_command('warm_thumbnails', workers=0, stdout=out)
+        self.assertIn('для 1 картинок', out.getvalue())
+        self.assertEqual(
+            len(self.thumbnails()), len(all_presets()))
+
+    def test_warm_thumbnails_skips_broken_images(self):
+        """Ошибка на одной картинке не останавливает прогрев остальных."""
+        Post.objects.create(
+            author=self.user, text='Битая', image='posts/broken.gif')
+        self.create_post()
+
+        def build(name):
+            if name == 'posts/broken.gif':
+                raise OSError(name)
+            return build_thumbnails(name)
+
+        out = StringIO()
+        with mock.patch('posts.thumbnails.build_thumbnails', build):
+            with self.assertLogs('posts.thumbnails', 'ERROR'):
+                call_command('warm_thumbnails', workers=0, stdout=out)
+        self.assertIn('для 1 картинок', out.getvalue())
+        self.assertIn('Не удалось построить для 1 картинок', out.getvalue())
+        self.assertEqual(
+            len(self.thumbnails()), len(all_presets()))
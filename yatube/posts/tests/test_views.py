@@ -3,11 +3,13 @@ import tempfile
 
 from django import forms
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from ..models import Follow, Group, Post, User
+from ..paginator import encode_cursor
 
 TEST_OF_POST: int = 13
 FIRST_NUMBER_OF_POSTS = 10
@@ -51,6 +53,7 @@ class TaskPagesTests(TestCase):
         super().tearDownClass()
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -205,6 +208,7 @@ class PaginatorViewsTest(TestCase):
         Post.objects.bulk_create(cls.posts)
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -246,6 +250,60 @@ class PaginatorViewsTest(TestCase):
                 SECOND_NUMBER_OF_POSTS
             )
 
+    def test_cursor_pages_walk_forward_and_back(self):
+        """Токены after/before ведут на соседние страницы."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        self.assertFalse(first.has_previous())
+        second = self.client.get(
+            url, {'after': first.next_cursor}).context['page_obj']
+        self.assertEqual(len(second), SECOND_NUMBER_OF_POSTS)
+        self.assertFalse(second.has_next())
+        back = self.client.get(
+            url, {'before': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        shown = list(first) + list(second)
+        self.assertEqual(len(set(shown)), TEST_OF_POST)
+        self.assertEqual(
+            [post.pk for post in shown],
+            list(Post.objects.order_by('-pub_date', '-id')
+                 .values_list('pk', flat=True)),
+        )
+
+    def test_broken_cursor_shows_first_page(self):
+        response = self.client.get(
+            reverse('posts:index'), {'after': 'не-токен'})
+        self.assertEqual(
+            len(response.context['page_obj']), FIRST_NUMBER_OF_POSTS)
+
+    def test_cursor_with_wrong_types_shows_first_page(self):
+        """Токен с чужими типами значений не роняет страницу."""
+        for token in (encode_cursor([1, 2]), encode_cursor([[1], 'x']),
+                      encode_cursor([None, True])):
+            with self.subTest(token=token):
+                response = self.client.get(
+                    reverse('posts:index'), {'after': token})
+                self.assertEqual(
+                    len(response.context['page_obj']),
+                    FIRST_NUMBER_OF_POSTS)
+
+    def test_cursor_out_of_range_shows_first_page(self):
+        """Числа, не влезающие в SQLite, не приводят к ошибке 500."""
+        for values in (['2020-01-01T00:00:00', 10 ** 30],
+                       ['2020-01-01T00:00:00', float('inf')]):
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse('posts:index'), {'after': encode_cursor(values)})
+                self.assertEqual(
+                    len(response.context['page_obj']),
+                    FIRST_NUMBER_OF_POSTS)
+
+    def test_huge_page_number_shows_first_page(self):
+        response = self.client.get(
+            reverse('posts:index'), {'page': '9' * 30})
+        self.assertEqual(
+            len(response.context['page_obj']), FIRST_NUMBER_OF_POSTS)
+
 
 class FollowTest(TestCase):
     @classmethod
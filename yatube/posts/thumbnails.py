@@ -0,0 +1,104 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from sorl.thumbnail import delete, get_thumbnail
+
+from .images import all_presets, picture_key
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def image_file(name):
+    """FieldFile картинки поста по имени файла в хранилище."""
+    field = Post._meta.get_field('image')
+    return field.attr_class(None, field, name)
+
+
+def build_thumbnails(name):
+    """Строит миниатюры из THUMBNAIL_PRESETS и варианты для srcset.
+
+    sorl-thumbnail запоминает готовые миниатюры в своём хранилище
+    ключей, поэтому шаблонные теги их уже не пересчитывают.
+    """
+    image = image_file(name)
+    for geometry, options in all_presets():
+        get_thumbnail(image, geometry, **options)
+    return name
+
+
+def try_build_thumbnails(name):
+    """build_thumbnails, пишущий ошибку в лог вместо исключения."""
+    try:
+        build_thumbnails(name)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры для %s', name)
+        return False
+    return True
+
+
+def _build_in_worker(name):
+    try:
+        try_build_thumbnails(name)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def schedule_thumbnails(name):
+    """Строит миниатюры в фоновом пуле после фиксации транзакции.
+
+    Pillow отпускает GIL на декодировании и масштабировании, поэтому
+    хватает потоков. При THUMBNAIL_WORKERS = 0 всё строится сразу.
+    """
+    if not settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: build_thumbnails(name))
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(_build_in_worker, name)
+    )
+
+
+def release_image(name):
+    """Удаляет блоб и его миниатюры, если на него не ссылается ни один пост.
+
+    Одинаковые картинки хранятся одним файлом, поэтому число ссылок
+    считается запросом по индексу на Post.image. Проверка и удаление
+    идут под замком хранилища, под которым загрузка берёт готовый
+    блоб. Блоб, сохранённый за последние IMAGE_RELEASE_GRACE секунд,
+    мог достаться ещё не зафиксированному посту: его оставляет до
+    следующего прогона команда release_images.
+    """
+    if not name:
+        return False
+    image = image_file(name)
+    with image.storage.locked():
+        if Post.objects.filter(image=name).exists_on_any_shard():
+            return False
+        if image.storage.exists(name):
+            age = time.time() - os.path.getmtime(image.path)
+            if age < settings.IMAGE_RELEASE_GRACE:
+                return False
+        delete(image)
+    cache.delete(picture_key(name))
+    return True
+
+
+def schedule_release(name):
+    transaction.on_commit(lambda: release_image(name))
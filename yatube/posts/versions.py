@@ -0,0 +1,68 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+
+def version_key(scope):
+    return f'feed-version:{scope}'
+
+
+def modified_key(scope):
+    return f'feed-modified:{scope}'
+
+
+def initial_version():
+    """Новое поколение больше любого выданного до вытеснения ключа."""
+    return int(time.time() * 1000)
+
+
+def get_versions(*scopes):
+    """Возвращает поколения лент, заводя недостающие.
+
+    Поколение входит в ключ кэша фрагмента, поэтому запись в ленту делает
+    старые фрагменты недостижимыми без удаления по маске.
+    """
+    keys = {version_key(scope): scope for scope in scopes}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, initial_version(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def get_version(scope):
+    return get_versions(scope)[scope]
+
+
+def last_modified(*scopes):
+    """Время последней записи в любую из лент.
+
+    Если отметка вытеснена из кэша, она заводится заново текущим
+    временем: это позже настоящего изменения и не даст ложного 304.
+    """
+    keys = [modified_key(scope) for scope in scopes]
+    stamps = cache.get_many(keys)
+    now = time.time()
+    for key in set(keys) - stamps.keys():
+        cache.add(key, now, None)
+        stamps[key] = cache.get(key, now)
+    return datetime.fromtimestamp(max(stamps.values()), timezone.utc)
+
+
+def bump(*scopes):
+    for scope in scopes:
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, initial_version(), None)
+    now = time.time()
+    cache.set_many({modified_key(scope): now for scope in scopes}, None)
+
+
+def post_scopes(author_id, group_id):
+    scopes = ['index', f'author:{author_id}']
+    if group_id is not None:
+        scopes.append(f'group:{group_id}')
+    return scopes
@@ -1,70 +1,150 @@
+from urllib.parse import urlencode
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.http import HttpResponseRedirect
+from django.http import (Http404, HttpResponseRedirect, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from . import entities, export, feed, versions
+from .conditional import (feed_condition, follow_scopes, group_scopes,
+                          index_scopes, post_scopes, profile_scopes)
+from .forms import CommentForm, PostForm, SearchForm
+from .models import Follow, Post
+from .page_cache import cache_anonymous_page, cache_page_body
+from .paginator import CursorPaginator
+from .replicas import replica_reads
+from .search import PostSearch
 
 NUMBER_OF_POSTS: int = 10
+NUMBER_OF_COMMENTS: int = 20
+COMMENTS_ORDERING = ('created', 'id')
 
 
+@cache_anonymous_page
+@feed_condition(index_scopes)
+@replica_reads
+@cache_page_body
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.with_related('author', 'group').per_shard()
+    paginator = CursorPaginator(post_list, NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET)
     template = 'posts/index.html'
     title_index = 'Это главная страница проекта Yatube'
     context = {'title_index': title_index,
-               'page_obj': page_obj}
+               'page_obj': page_obj,
+               'feed_version': versions.get_version('index')}
     return render(request, template, context)
 
 
+@cache_anonymous_page
+@feed_condition(group_scopes)
+@replica_reads
+@cache_page_body
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = entities.group_or_404(slug)
+    posts = group.posts.with_related('author').per_shard()
+    paginator = CursorPaginator(posts, NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_version': versions.get_version(f'group:{group.pk}'),
     }
     template = 'posts/group_list.html'
     return render(request, template, context)
 
 
+@cache_anonymous_page
+@feed_condition(profile_scopes)
+@replica_reads
+@cache_page_body
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    paginator = Paginator(author.posts.all(), NUMBER_OF_POSTS)
-    posts_number = request.GET.get('page')
-    page_obj = paginator.get_page(posts_number)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists()
+    author = entities.user_or_404(username)
+    paginator = CursorPaginator(
+        author.posts.with_related('group'),
+        NUMBER_OF_POSTS,
+    )
+    page_obj = paginator.get_page(request.GET)
     context = {
         'author': author,
-        'posts_number': posts_number,
         'page_obj': page_obj,
-        'following': following,
+        'feed_version': versions.get_version(f'author:{author.pk}'),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@cache_anonymous_page
+@feed_condition(post_scopes)
+@replica_reads
+@cache_page_body
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    form = CommentForm()
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.on_post_shard(post_id).with_related(
+            'author__stats', 'group'),
+        pk=post_id,
+    )
+    comments = CursorPaginator(
+        post.comments.with_related('author'),
+        NUMBER_OF_COMMENTS,
+        ordering=COMMENTS_ORDERING,
+    ).page_number(1)
     context = {
         'post': post,
-        'form': form,
         'comments': comments,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@cache_anonymous_page
+@feed_condition(post_scopes)
+@replica_reads
+def post_comments(request, post_id):
+    """Следующие страницы комментариев: HTML-фрагмент или JSON."""
+    post = get_object_or_404(
+        Post.objects.on_post_shard(post_id).only('pk'), pk=post_id)
+    comments = CursorPaginator(
+        post.comments.with_related('author'),
+        NUMBER_OF_COMMENTS,
+        ordering=COMMENTS_ORDERING,
+    ).get_page(request.GET)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+            'next': comments.next_cursor,
+        })
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+@replica_reads
+def search(request):
+    form = SearchForm(request.GET or None)
+    page_obj = None
+    page_query = ''
+    if form.is_valid():
+        query = form.cleaned_data['q']
+        page_obj = PostSearch(query, NUMBER_OF_POSTS).get_page(request.GET)
+        page_query = urlencode({'q': query}) + '&'
+    context = {
+        'form': form,
+        'page_obj': page_obj,
+        'page_query': page_query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -81,7 +161,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.on_post_shard(post_id), pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
 
@@ -103,7 +183,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.on_post_shard(post_id), id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -114,15 +194,16 @@ def add_comment(request, post_id):
 
 
 @login_required
+@feed_condition(follow_scopes)
+@replica_reads
 def follow_index(request):
-    user = request.user
-    authors = user.follower.values_list('author', flat=True)
-    posts_list = Post.objects.filter(author__id__in=authors)
-
-    paginator = Paginator(posts_list, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page_obj')
-    page_org = paginator.get_page(page_number)
-    context = {'page_obj': page_org}
+    paginator = CursorPaginator(
+        feed.feed_sources(request.user),
+        NUMBER_OF_POSTS,
+        ordering=feed.FEED_ORDERING,
+    )
+    page_obj = paginator.get_page(request.GET)
+    context = {'page_obj': page_obj}
     return render(
         request,
         'posts/follow.html',
@@ -132,7 +213,7 @@ def follow_index(request):
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = entities.user_or_404(username)
     user = request.user
     if author != user:
         Follow.objects.get_or_create(user=user, author=author)
@@ -145,8 +226,30 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = entities.user_or_404(username)
     template = Follow.objects.filter(user=request.user, author=author)
     if template.exists():
         template.delete()
     return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
+
+
+@staff_member_required
+def export_table(request, table):
+    """Потоковая выгрузка таблицы для сотрудников, ?since=<id>."""
+    if table not in export.EXPORTS:
+        raise Http404
+    file_format = request.GET.get('format', 'ndjson')
+    if file_format not in export.FORMATS:
+        file_format = 'ndjson'
+    try:
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        since = 0
+    response = StreamingHttpResponse(
+        export.render(table, file_format, export.export_rows(table, since)),
+        content_type=f'{export.FORMATS[file_format]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}.{file_format}"'
+    )
+    return response
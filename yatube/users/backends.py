@@ -0,0 +1,13 @@
+from django.contrib.auth.backends import ModelBackend
+
+from posts import entities
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, берущий пользователя сессии из кэша сущностей."""
+
+    def get_user(self, user_id):
+        user = entities.get_user(user_id)
+        if user is not None and self.user_can_authenticate(user):
+            return user
+        return None
@@ -30,11 +30,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.slow_queries.SlowQueryMiddleware',
+    'core.profiling.ProfileMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -44,7 +48,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,9 +69,52 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', '60')),
     }
 }
 
+REPLICA_DATABASES = []
+
+for number, path in enumerate(
+        filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+SHARDS = int(os.environ.get('YATUBE_SHARDS', '0'))
+
+# Два шарда описаны всегда: тесты включают шардирование через
+# override_settings(SHARD_DATABASES=...), не меняя DATABASES.
+for number in range(max(SHARDS, 2)):
+    DATABASES[f'shard{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'shard{number}.sqlite3'),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+    }
+
+SHARD_DATABASES = [f'shard{number}' for number in range(SHARDS)]
+
+DATABASE_ROUTERS = [
+    'posts.sharding.ShardRouter',
+    'core.replicas.ReplicaRouter',
+]
+
+REPLICA_STICKY_SECONDS = 5
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -85,6 +132,14 @@ AUTH_PASSWORD_VALIDATORS = [
 
 LANGUAGE_CODE = 'ru'
 
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    # Сессии, открытые до кэша сущностей, ссылаются на этот бэкенд.
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -108,8 +163,55 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# L2 — файл SQLite, общий для процессов сервера: через него воркеры
+# видят одни и те же версии, сбросы и закрепления за основной базой.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.caching.TieredCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_PATH', os.path.join(BASE_DIR, 'cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 1,
+            'STALE_TIMEOUT': 300,
+            'LOCK_TIMEOUT': 30,
+            'WAIT_TIMEOUT': 5,
+        },
     }
 }
+
+FEED_MAX_ENTRIES = 500
+
+FEED_TRIM_EVERY = 10
+
+FEED_PULL_THRESHOLD = 1000
+
+THUMBNAIL_PRESETS = [
+    ('604x250', {'crop': 'center', 'upscale': True}),
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+
+THUMBNAIL_WORKERS = 2
+
+IMAGE_MAX_SIDE = 2048
+
+IMAGE_RELEASE_GRACE = 60
+
+IMAGE_CARD_GEOMETRIES = ['604x250', '960x339']
+
+IMAGE_VARIANT_WIDTHS = [320, 640, 960, 1280]
+
+IMAGE_VARIANT_FORMATS = ['WEBP', 'JPEG']
+
+PAGE_CACHE_TIMEOUT = 600
+
+ENTITY_CACHE_TIMEOUT = 3600
+
+PROFILE_SAMPLE_RATE = 0.0
+
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+PROFILE_KEEP = 20
+
+SLOW_QUERY_THRESHOLD_MS = 100